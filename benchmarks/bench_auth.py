@@ -0,0 +1,101 @@
+"""Auth middleware benchmark.
+
+Times small requests and a streamed (SSE) result through the app in-process,
+without auth, with the previous @app.middleware("http") session check, and
+with the pure ASGI AuthMiddleware.
+
+    python benchmarks/bench_auth.py
+    python benchmarks/bench_auth.py --requests 5000 --events 50000
+"""
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+
+import httpx
+from fastapi import Request
+from fastapi.responses import JSONResponse, RedirectResponse
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from func_to_web import create_app
+
+
+def ping() -> str:
+    return "pong"
+
+
+def stream(n: int):
+    for i in range(n):
+        yield i
+
+
+def legacy_auth(app) -> None:
+    """The previous session check, inserted inside SessionMiddleware."""
+    async def auth_middleware(request: Request, call_next):
+        path = request.url.path
+        if path in ["/login", "/auth", "/logout"] or path.startswith(("/static", "/front", "/assets")):
+            return await call_next(request)
+        if not request.session.get("user"):
+            if "application/json" in request.headers.get("accept", ""):
+                return JSONResponse({"error": "Unauthorized"}, status_code=401)
+            return RedirectResponse(url="/login")
+        return await call_next(request)
+
+    # Swap the pure ASGI middleware for the BaseHTTPMiddleware version, in place.
+    app.user_middleware = [
+        Middleware(BaseHTTPMiddleware, dispatch=auth_middleware)
+        if m.cls.__name__ == "AuthMiddleware" else m
+        for m in app.user_middleware
+    ]
+
+
+def build(mode: str):
+    auth = {"admin": "secret"} if mode != "none" else None
+    tmp = tempfile.mkdtemp(prefix="ftw-bench-")
+    app = create_app(
+        [ping, stream], auth=auth, secret_key="bench",
+        uploads_dir=f"{tmp}/uploads", returns_dir=f"{tmp}/returns",
+    )
+    if mode == "legacy":
+        legacy_auth(app)
+    return app
+
+
+async def run_mode(mode: str, requests: int, events: int) -> tuple[float, float]:
+    app = build(mode)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        if mode != "none":
+            await client.post("/auth", data={"username": "admin", "password": "secret"})
+
+        await client.get("/doc")
+        start = time.perf_counter()
+        for _ in range(requests):
+            response = await client.get("/doc")
+        per_request = (time.perf_counter() - start) / requests
+        assert response.status_code == 200, response.status_code
+
+        start = time.perf_counter()
+        response = await client.post("/stream/submit", data={"values": json.dumps({"n": events})})
+        elapsed = time.perf_counter() - start
+        assert response.text.count("event: partial") == events, "stream was cut short"
+
+    return per_request, events / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--events", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'auth':>8} {'per request':>12} {'SSE events/s':>13}")
+    for mode in ("none", "legacy", "asgi"):
+        per_request, throughput = asyncio.run(run_mode(mode, args.requests, args.events))
+        print(f"{mode:>8} {per_request * 1e6:>10.0f}µs {throughput:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
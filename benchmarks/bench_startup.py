@@ -0,0 +1,65 @@
+"""Cold start benchmark.
+
+Times, each in a fresh interpreter: `import func_to_web`, and building an app
+with create_app() for catalogs of plain functions. Reports the median of
+several runs.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --functions 10 1000 --runs 9
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import tempfile
+
+IMPORT = """
+import time
+start = time.perf_counter()
+import func_to_web
+print(time.perf_counter() - start)
+"""
+
+CREATE_APP = """
+import time
+start = time.perf_counter()
+from func_to_web import create_app
+
+def make(i):
+    def tool(a: int, b: str = "x") -> str:
+        return f"{{a}}-{{b}}"
+    tool.__name__ = f"tool_{{i}}"
+    return tool
+
+items = [make(i) for i in range({n})]
+app = create_app(items, uploads_dir="{tmp}/uploads", returns_dir="{tmp}/returns")
+print(time.perf_counter() - start)
+"""
+
+
+def timed_runs(code: str, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        )
+        samples.append(float(out.stdout.strip().splitlines()[-1]))
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--functions", type=int, nargs="+", default=[1, 100, 3000])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="ftw-bench-")
+
+    print(f"{'import func_to_web':>28} {timed_runs(IMPORT, args.runs) * 1e3:>8.1f} ms")
+    for n in args.functions:
+        elapsed = timed_runs(CREATE_APP.format(n=n, tmp=tmp), args.runs)
+        print(f"{f'import + create_app({n})':>28} {elapsed * 1e3:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
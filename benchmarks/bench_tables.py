@@ -0,0 +1,79 @@
+"""Table serialization benchmark.
+
+Times try_process_table() on pandas, polars and NumPy frames of 10k to 1M rows,
+next to the old per-cell str() conversion, both inline and spilled to CSV.
+
+    python benchmarks/bench_tables.py
+    python benchmarks/bench_tables.py --rows 10000 100000 --spill
+"""
+import argparse
+import tempfile
+import time
+import numpy as np
+
+from func_to_web.core.settings import Settings, use_settings
+from func_to_web.core.table import try_process_table
+
+
+def make_frames(rows: int) -> dict:
+    rng = np.random.default_rng(0)
+    data = {
+        "id": np.arange(rows),
+        "value": rng.random(rows),
+        "label": rng.choice(["alpha", "beta", "gamma"], rows),
+    }
+    frames = {"numpy": rng.random((rows, 3))}
+
+    try:
+        import pandas as pd
+        frames["pandas"] = pd.DataFrame(data)
+    except ImportError:
+        pass
+
+    try:
+        import polars as pl
+        frames["polars"] = pl.DataFrame(data)
+    except ImportError:
+        pass
+
+    return frames
+
+
+def per_cell(frame) -> list:
+    """The previous implementation: one Python str() call per cell."""
+    if isinstance(frame, np.ndarray):
+        rows = (row.tolist() for row in frame)
+    elif hasattr(frame, "itertuples"):
+        rows = frame.itertuples(index=False, name=None)
+    else:
+        rows = frame.iter_rows()
+    return [[str(cell) for cell in row] for row in rows]
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--spill", action="store_true", help="also time the CSV spill path")
+    args = parser.parse_args()
+
+    settings = Settings(returns_dir=tempfile.mkdtemp(prefix="ftw-bench-"))
+
+    print(f"{'rows':>10} {'library':>8} {'per-cell':>10} {'inline':>10} {'spill':>10}")
+    with use_settings(settings):
+        for rows in args.rows:
+            for name, frame in make_frames(rows).items():
+                try_process_table(frame[:100])  # warm up imports and caches
+                baseline = timed(lambda: per_cell(frame))
+                inline = timed(lambda: try_process_table(frame))
+                spill = timed(lambda: try_process_table(frame, 64 * 1024)) if args.spill else float("nan")
+                print(f"{rows:>10} {name:>8} {baseline:>9.3f}s {inline:>9.3f}s {spill:>9.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,38 @@
 from .types import *
-from .run import run
 from .models import FunctionMetadata, HiddenFunction
 from .core.utils import list_css_variables
+from .core.storage import Storage, LocalStorage, MemoryStorage, S3Storage
+from .core.resources import Resource
 
 
-__version__ = "1.0.2"
\ No newline at end of file
+__version__ = "1.0.2"
+
+# Server-side entry points are imported on first access, so tool modules that
+# only need the types above don't pay for FastAPI, Starlette and the routes.
+_LAZY_ATTRS = {
+    "run": ".run",
+    "create_app": ".run",
+    "hash_api_token": ".core.auth",
+    "register_result_processor": ".process_result",
+}
+
+
+def __getattr__(name: str):
+    module = _LAZY_ATTRS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    from importlib import import_module
+
+    # Bind every name from the module at once: importing .run also sets the
+    # package attribute "run" to the submodule, which would otherwise shadow
+    # the function of the same name.
+    loaded = import_module(module, __name__)
+    for attr, source in _LAZY_ATTRS.items():
+        if source == module:
+            globals()[attr] = getattr(loaded, attr)
+    return globals()[name]
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *_LAZY_ATTRS])
@@ -1,19 +1,11 @@
 import json
 
-from jinja2 import Environment, FileSystemLoader
 from pytypeinput import ParamMetadata
 
-from .core.constants import TEMPLATES_DIR
+from .core.templates import get_template
 from .models import NormalizedInput, FunctionMetadata
 
 
-# Shared Jinja environment (templates are static → no auto reload)
-_jinja_env = Environment(
-    loader=FileSystemLoader(TEMPLATES_DIR),
-    auto_reload=False
-)
-
-
 def _count_visible_items(navigation_data: list) -> int:
     """Count visible (non-hidden) functions in the nav tree."""
     count = 0
@@ -35,7 +27,7 @@ def render_page(
     # Frontend builds the form from serialized param metadata
     params_json = json.dumps([p.to_dict() for p in params])
 
-    form_html = _jinja_env.get_template("form.html").render(
+    form_html = get_template("form.html").render(
         title=meta.name,
         description=meta.description,
         action=f"{base_url}/submit",
@@ -47,7 +39,7 @@ def render_page(
     if _count_visible_items(navigation_data) < 2:
         navigation_data = None
 
-    return _jinja_env.get_template("page.html").render(
+    return get_template("page.html").render(
         page_title=meta.name,
         form_html=form_html,
         css_vars=app_input.css_vars,
@@ -58,7 +50,7 @@ def render_page(
 
 def render_index(app_input: NormalizedInput) -> str:
     """Render the index page (multi-function mode)."""
-    return _jinja_env.get_template("index.html").render(
+    return get_template("index.html").render(
         page_title=app_input.title,
         items=app_input.navigation_data,
         css_vars=app_input.css_vars,
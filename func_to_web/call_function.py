@@ -6,11 +6,51 @@ from fastapi.responses import StreamingResponse
 from .models import FunctionMetadata
 from .core.save_file_handler import cleanup_uploaded_file
 from .core.print_capture import PrintCapture
-from .process_result import process_result, process_error
+from .core.settings import get_settings
+from .process_result import process_result, process_error, stage_file_streams
 
 
-# Can be disabled via run(stream_prints=False).
-STREAM_PRINTS = True
+# Partial results buffered per stream. A generator that runs ahead of its
+# client waits for room instead of buffering its whole output.
+PARTIAL_QUEUE_SIZE = 8
+
+
+class PartialQueue:
+    """Serialized partial results on their way from a generator to a client.
+
+    put() waits while maxsize items are pending (0 means unbounded). Once
+    closed, because the client went away, further partials are dropped so the
+    generator never blocks on a queue nobody reads.
+    """
+
+    def __init__(self, maxsize: int = PARTIAL_QUEUE_SIZE):
+        self._queue: asyncio.Queue[dict] = asyncio.Queue(maxsize)
+        self._ready = asyncio.Event()
+        self._closed = False
+
+    async def put(self, item: dict) -> None:
+        if not self._closed:
+            await self._queue.put(item)
+            self._ready.set()
+
+    async def wait(self, timeout: float) -> None:
+        """Return when an item was put since the last call, or after timeout."""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._ready.clear()
+
+    def drain(self) -> list[dict]:
+        """Pending items, oldest first, freeing room for the producer."""
+        items = []
+        while not self._queue.empty():
+            items.append(self._queue.get_nowait())
+        return items
+
+    def close(self) -> None:
+        self._closed = True
+        self.drain()  # wakes a producer waiting in put()
 
 
 def _run_sync_with_capture(func, cap: PrintCapture, kwargs: dict):
@@ -19,43 +59,133 @@ def _run_sync_with_capture(func, cap: PrintCapture, kwargs: dict):
         return func(**kwargs)
 
 
+def _run_sync_gen_with_capture(func, cap: PrintCapture, kwargs: dict, emit):
+    """Drive a sync generator function with stdout capture, emitting each yielded value.
+
+    Returns the generator's return value.
+    """
+    with cap.capture_sync():
+        gen = func(**kwargs)
+        while True:
+            try:
+                value = next(gen)
+            except StopIteration as stop:
+                return stop.value
+            emit(value)
+
+
+async def execute_function(
+    meta: FunctionMetadata,
+    kwargs: dict,
+    cap: PrintCapture,
+    columnar: bool = False,
+    partials: PartialQueue | None = None
+) -> dict:
+    """Run the function and return the data of its "result" event.
+
+    Supports async and sync callables, and (async) generator functions, whose
+    yielded values are serialized into partials as they are produced (waiting
+    while it is full, dropped if partials is None). Results are serialized in
+    a worker thread, since that may spill files or encode images. Exceptions
+    become an error result.
+    """
+    loop = asyncio.get_running_loop()
+    if partials is None:
+        partials = PartialQueue(0)
+        partials.close()
+
+    def emit_from_thread(value):
+        """Serialize a value yielded by a sync generator (runs in its thread)."""
+        asyncio.run_coroutine_threadsafe(stage_file_streams(value), loop).result()
+        item = {"success": True, **process_result(value, columnar)}
+        asyncio.run_coroutine_threadsafe(partials.put(item), loop).result()
+
+    func = meta.function
+    try:
+        streaming = inspect.isasyncgenfunction(func) or inspect.isgeneratorfunction(func)
+
+        if inspect.isasyncgenfunction(func):
+            with cap.capture_async():
+                async for value in func(**kwargs):
+                    await stage_file_streams(value)
+                    data = await asyncio.to_thread(process_result, value, columnar)
+                    await partials.put({"success": True, **data})
+            result = None
+        elif inspect.isgeneratorfunction(func):
+            result = await asyncio.to_thread(
+                _run_sync_gen_with_capture, func, cap, kwargs, emit_from_thread
+            )
+        elif inspect.iscoroutinefunction(func):
+            with cap.capture_async():
+                result = await func(**kwargs)
+        else:
+            # Run sync functions in a thread so the event loop stays responsive.
+            result = await asyncio.to_thread(
+                _run_sync_with_capture, func, cap, kwargs
+            )
+
+        if streaming and result is None:
+            return {"success": True, "type": "end"}
+        await stage_file_streams(result)
+        return {
+            "success": True,
+            **await asyncio.to_thread(process_result, result, columnar),
+        }
+    except Exception as exc:
+        return {
+            "success": False,
+            **process_error(exc),
+        }
+
+
+def _sse_response(events) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
+def result_response(data: dict) -> StreamingResponse:
+    """SSE response carrying an already computed result (start + result events)."""
+    async def event_stream():
+        yield "event: start\ndata: {}\n\n"
+        yield f"event: result\ndata: {json.dumps(data)}\n\n"
+
+    return _sse_response(event_stream())
+
+
 async def call_function(
     meta: FunctionMetadata,
     validated: dict,
-    saved_paths: list[str]
+    saved_paths: list[str],
+    columnar: bool = False
 ) -> StreamingResponse:
-    """Execute the function and stream start/print/result SSE events.
+    """Execute the function and stream start/print/partial/result SSE events.
 
-    Supports both async and sync callables. Uploaded files are always cleaned up
-    after execution.
+    Every value yielded by a generator function is sent as a "partial" event
+    as soon as it is produced, and the final "result" event has type "end"
+    (or carries the generator's return value). Uploaded files are always
+    cleaned up after execution. columnar selects the column-oriented table
+    format.
     """
     cap = PrintCapture()
+    stream_prints = get_settings().stream_prints
 
     async def event_stream():
         done = asyncio.Event()
         result_holder = {}
+        partials = PartialQueue()
 
         async def run():
             """Run the function and store the serialized result."""
             try:
-                if inspect.iscoroutinefunction(meta.function):
-                    with cap.capture_async():
-                        result = await meta.function(**validated)
-                else:
-                    # Run sync functions in a thread so the event loop stays responsive.
-                    result = await asyncio.to_thread(
-                        _run_sync_with_capture, meta.function, cap, validated
-                    )
-
-                result_holder["data"] = {
-                    "success": True,
-                    **process_result(result),
-                }
-            except Exception as exc:
-                result_holder["data"] = {
-                    "success": False,
-                    **process_error(exc),
-                }
+                result_holder["data"] = await execute_function(
+                    meta, validated, cap, columnar, partials
+                )
             finally:
                 for p in saved_paths:
                     cleanup_uploaded_file(p)
@@ -65,25 +195,29 @@ async def call_function(
 
         asyncio.create_task(run())
 
-        # Poll captured prints while execution is still running.
-        while not done.is_set():
+        def drain():
+            """Pending print and partial events, prints first."""
             lines = cap.drain()
-            if STREAM_PRINTS and lines:
+            if stream_prints and lines:
                 yield f"event: print\ndata: {json.dumps(lines)}\n\n"
-            await asyncio.sleep(0.05)
-
-        # Flush any late print output before sending the final result.
-        lines = cap.drain()
-        if STREAM_PRINTS and lines:
-            yield f"event: print\ndata: {json.dumps(lines)}\n\n"
-
-        yield f"event: result\ndata: {json.dumps(result_holder['data'])}\n\n"
-
-    return StreamingResponse(
-        event_stream(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "X-Accel-Buffering": "no",
-        },
-    )
\ No newline at end of file
+            for item in partials.drain():
+                yield f"event: partial\ndata: {json.dumps(item)}\n\n"
+
+        try:
+            # Poll captured prints and partial results while execution is still
+            # running. The generator waits while the client is slow to read.
+            while not done.is_set():
+                for event in drain():
+                    yield event
+                await partials.wait(0.05)
+
+            # Flush any late output before sending the final result.
+            for event in drain():
+                yield event
+
+            yield f"event: result\ndata: {json.dumps(result_holder['data'])}\n\n"
+        finally:
+            # Client gone: let the generator finish without blocking on us.
+            partials.close()
+
+    return _sse_response(event_stream())
@@ -1,28 +1,122 @@
+import hashlib
 import secrets
 
 from fastapi import FastAPI, Request
 from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
-from jinja2 import Environment, FileSystemLoader
+from starlette.datastructures import Headers
 from starlette.middleware.sessions import SessionMiddleware
 
-from .constants import TEMPLATES_DIR
+from .templates import get_template
 
 
-_jinja_env = Environment(
-    loader=FileSystemLoader(TEMPLATES_DIR),
-    auto_reload=False
-)
+# Reachable without a session.
+_PUBLIC_PATHS = frozenset({"/login", "/auth", "/logout"})
+_PUBLIC_PREFIXES = ("/static", "/front", "/assets")
+
+_TOKEN_HASH_PREFIX = "sha256:"
+
+
+def hash_api_token(token: str) -> str:
+    """Hashed form of an API token, to put in config instead of the token itself.
+
+    Example:
+        python -c "from func_to_web import hash_api_token; print(hash_api_token('...'))"
+    """
+    return _TOKEN_HASH_PREFIX + hashlib.sha256(token.encode()).hexdigest()
+
+
+def _token_table(api_tokens: dict[str, str]) -> dict[bytes, str]:
+    """Map SHA-256 digest → client name. Plain tokens are hashed and dropped.
+
+    Tokens are looked up by digest, so the lookup takes the same time
+    whatever the presented token, and plain tokens are not kept in memory.
+    """
+    table = {}
+    for name, token in api_tokens.items():
+        if token.startswith(_TOKEN_HASH_PREFIX):
+            digest = bytes.fromhex(token[len(_TOKEN_HASH_PREFIX):])
+        else:
+            digest = hashlib.sha256(token.encode()).digest()
+        if len(digest) != 32:
+            raise ValueError(f"Invalid hashed API token for {name!r}")
+        table[digest] = name
+    return table
+
+
+def _bearer_token(scope) -> bytes | None:
+    """Token from an "Authorization: Bearer <token>" header, or None."""
+    for key, value in scope["headers"]:
+        if key == b"authorization":
+            scheme, _, token = value.partition(b" ")
+            if scheme.lower() == b"bearer" and token.strip():
+                return token.strip()
+            return None
+    return None
+
+
+class AuthMiddleware:
+    """Pure ASGI session and API token check; runs inside SessionMiddleware.
+
+    Authenticated requests are passed through untouched, so streamed (SSE)
+    responses are not wrapped in an extra task and memory stream as with
+    @app.middleware("http").
+
+    Requests with "Authorization: Bearer <token>" are checked against the
+    API tokens only and answered 401 (never redirected) when it is wrong.
+    The client name is stored in scope["state"]["api_client"].
+    """
+
+    def __init__(self, app, api_tokens: dict[bytes, str] | None = None):
+        self.app = app
+        self.api_tokens = api_tokens or {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        if path in _PUBLIC_PATHS or path.startswith(_PUBLIC_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+
+        token = _bearer_token(scope) if self.api_tokens else None
+        if token is not None:
+            client = self.api_tokens.get(hashlib.sha256(token).digest())
+            if client is None:
+                response = JSONResponse(
+                    {"error": "Invalid API token"},
+                    status_code=401,
+                    headers={"WWW-Authenticate": 'Bearer error="invalid_token"'},
+                )
+                await response(scope, receive, send)
+                return
+            scope.setdefault("state", {})["api_client"] = client
+            await self.app(scope, receive, send)
+            return
+
+        if scope["session"].get("user"):
+            await self.app(scope, receive, send)
+            return
+
+        if "application/json" in Headers(scope=scope).get("accept", ""):
+            response = JSONResponse({"error": "Unauthorized"}, status_code=401)
+        else:
+            response = RedirectResponse(url="/login")
+        await response(scope, receive, send)
 
 
 def setup_auth(
     app: FastAPI,
     auth: dict[str, str],
-    secret_key: str | None = None
+    secret_key: str | None = None,
+    api_tokens: dict[str, str] | None = None
 ) -> None:
-    """Enable simple session-based authentication.
+    """Enable simple session-based authentication, plus optional API tokens.
 
     Protects all routes except /login, /auth, /logout, /static, /front and /assets.
     Unauthenticated requests are redirected to /login (or return 401 for JSON).
+    api_tokens maps client names to bearer tokens (plain or hash_api_token()).
 
     Registers:
     - /login  → login page
@@ -31,26 +125,7 @@ def setup_auth(
     """
     key = secret_key or secrets.token_hex(32)
 
-    @app.middleware("http")
-    async def auth_middleware(request: Request, call_next):
-        path = request.url.path
-
-        if (
-            path in ["/login", "/auth", "/logout"]
-            or path.startswith("/static")
-            or path.startswith("/front")
-            or path.startswith("/assets")
-        ):
-            return await call_next(request)
-
-        # Require session for protected routes.
-        if not request.session.get("user"):
-            if "application/json" in request.headers.get("accept", ""):
-                return JSONResponse({"error": "Unauthorized"}, status_code=401)
-            return RedirectResponse(url="/login")
-
-        return await call_next(request)
-
+    app.add_middleware(AuthMiddleware, api_tokens=_token_table(api_tokens or {}))
     app.add_middleware(SessionMiddleware, secret_key=key, https_only=False)
 
     @app.get("/login", response_class=HTMLResponse)
@@ -58,7 +133,7 @@ def setup_auth(
         """Render login page."""
         if request.session.get("user"):
             return RedirectResponse(url="/")
-        template = _jinja_env.get_template("login.html")
+        template = get_template("login.html")
         return template.render(request=request)
 
     @app.post("/auth")
@@ -77,13 +152,13 @@ def setup_auth(
                 request.session["user"] = username
                 return RedirectResponse(url="/", status_code=303)
 
-            template = _jinja_env.get_template("login.html")
+            template = get_template("login.html")
             return HTMLResponse(
                 template.render(request=request, error="Invalid credentials")
             )
 
         except Exception:
-            template = _jinja_env.get_template("login.html")
+            template = get_template("login.html")
             return HTMLResponse(
                 template.render(request=request, error="Login failed")
             )
@@ -11,6 +11,5 @@ STATIC_DIR = CACHE_DIR / "static"
 UVICORN_DEFAULTS = {
     "reload": False,
     "limit_concurrency": 100,
-    "limit_max_requests": 10000,
     "timeout_keep_alive": 30,
 }
\ No newline at end of file
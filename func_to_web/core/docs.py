@@ -1,7 +1,7 @@
 import json
 
 from .normalization import get_all_functions
-from ..route_handlers import _analyze
+from ..route_handlers import _analyze, injected_resources, serialize_params
 
 
 _INTRO = """=== FuncToWeb API ===
@@ -27,6 +27,12 @@ Example with mixed params:
     -F 'photos=@./photo2.jpg'
 
 
+If the app requires login, authenticate with an API token instead of a
+session:
+
+  -H 'Authorization: Bearer <token>'
+
+
 === Parameter schema ===
 
 Each endpoint declares its parameters as a JSON object. Per-field keys:
@@ -54,24 +60,54 @@ HTTP 200 → Server-Sent Events stream:
   event: print           (zero or more, only if the function uses print())
   data: ["line", ...]
 
+  event: partial         (generator functions: one per yielded value)
+  data: { success: true, ...one of the shapes below... }
+
   event: result
   data: { ...see shapes below... }
 
+Generator functions end with { success: true, type: "end" } as the result,
+or with the shape of their return value if they return one.
+
 The "result" event always has "success" (bool). On success, "type" tells
 you which shape to expect:
 
   text          { success, type: "text",   data: "..." }
-  image         { success, type: "image",  data: "data:image/png;base64,..." }
+  image         { success, type: "image",  url, file_id, filename,
+                  [width, height], [full_url] }
+                  Fetch with: GET <base_url><url>. full_url is present when
+                  url is a downscaled preview.
   table         { success, type: "table",  headers: [...], rows: [[...]] }
   action_table  { success, type: "action_table", headers, rows,
                   action: "/<slug>" }   ← treat as table from the API
   download      { success, type: "download",  file_id, filename }
                   Fetch with: GET <base_url>/download/<file_id>
-                  Files expire (default 1h).
+                  Files expire (default 1h). Supports Range (resume),
+                  ETag/If-None-Match and Accept-Encoding: gzip.
   downloads     { success, type: "downloads", files: [{file_id, filename}] }
+                  Fetch all as one ZIP with:
+                  GET <base_url>/download/bundle?ids=<id1>,<id2>,...
   multiple      { success, type: "multiple", data: [<shape>, <shape>, ...] }
                   Mixed return values; each item is one of the shapes above.
 
+Send the header "X-Table-Format: columns" to get inline tables column by column,
+with numbers kept numeric:
+  table         { success, type: "table", format: "columns", headers, length,
+                  columns: [{dtype, data}] }
+                  dtype "str": data is a list of strings. dtype "bool", "int32",
+                  "float32", "float64": data is base64 of little-endian values
+                  (e.g. np.frombuffer(b64decode(data), "<f8")).
+Tables too large to send inline still use the rows shape below.
+
+Large text/table results carry only a preview in "data"/"rows", plus:
+  truncated: true, total_size (text) or total_rows (table),
+  download: {file_id, filename}   ← full result, fetch as above
+
+Large tables also carry paged: true and can be read page by page:
+  GET <base_url>/results/<file_id>/rows?offset=0&limit=100&sort=<col>
+  → { headers, rows, offset, total_rows }
+  limit is capped at 1000; sort is a column index, "-<col>" for descending.
+
 On failure inside the function:
 
   error         { success: false, type: "error", data: "<message>" }
@@ -111,14 +147,34 @@ def build_doc(app_input) -> str:
 
     parts = [_INTRO]
     for meta in funcs:
-        parts.append(_doc_for_function(meta))
+        parts.append(_doc_for_function(meta, app_input))
 
     return "\n".join(parts)
 
 
-def _doc_for_function(meta) -> str:
+def _param_dicts(meta, app_input) -> list[dict]:
+    """Serialized params; import-string functions not yet imported come from the manifest.
+
+    Parameters filled by resources are not listed: clients can't send them.
+    """
+    manifest = app_input.manifest
+    lazy = not meta.loaded
+    if lazy and manifest is not None:
+        cached = manifest.get_params(meta.import_string)
+        if cached is not None:
+            return cached
+
+    meta.load()
+    params, _ = _analyze(meta.function, frozenset(injected_resources(meta, app_input)))
+    serialized = serialize_params(params)
+    if lazy and manifest is not None:
+        manifest.record_params(meta.import_string, serialized)
+    return serialized
+
+
+def _doc_for_function(meta, app_input) -> str:
     """Build the documentation block for a single function."""
-    params, _ = _analyze(meta.function)
+    params = _param_dicts(meta, app_input)
 
     header = (
         f"\n--- /{meta.slug} ---\n"
@@ -128,23 +184,30 @@ def _doc_for_function(meta) -> str:
         header += "Hidden: true\n"
     if meta.description:
         header += f"Description: {meta.description}\n"
+    if meta.refresh_interval is not None:
+        header += (
+            f"Materialized: refreshed every {meta.refresh_interval:g} s; submits of the default "
+            f"values return the latest snapshot (add ?refresh=1 to refresh it first)\n"
+        )
+    if meta.cache_max_age is not None:
+        header += (
+            f"Cacheable: GET /{meta.slug}/result?<param>=<value> returns the result as JSON "
+            f"(Cache-Control max-age={meta.cache_max_age}, ETag); omitted params take their defaults\n"
+        )
 
     if not params:
         return header + "Parameters: none\n"
 
     params_dict = {}
     for p in params:
-        d = {k: v for k, v in p.to_dict().items() if k not in _DROP_KEYS}
+        d = {k: v for k, v in p.items() if k not in _DROP_KEYS}
 
         if d.get("special_widget") == "File":
             d["upload_info"] = {
-                "field_name": p.name,
+                "field_name": p["name"],
                 "multiple": "list" in d,
             }
 
-        if p.choices is not None and p.choices.options_function is not None:
-            d.setdefault("choices", {})["dynamic"] = True
-
-        params_dict[p.name] = d
+        params_dict[p["name"]] = d
 
-    return header + "Parameters:\n" + json.dumps(params_dict, indent=2, default=str) + "\n"
\ No newline at end of file
+    return header + "Parameters:\n" + json.dumps(params_dict, indent=2, default=str) + "\n"
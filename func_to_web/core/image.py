@@ -0,0 +1,95 @@
+from .return_file_handler import save_returned_output
+from .settings import get_settings
+
+# Encoding is configured per app via Settings.image_format, image_quality,
+# figure_format and image_preview_size.
+IMAGE_FORMATS = {"png": "PNG", "webp": "WEBP", "jpeg": "JPEG"}
+FIGURE_FORMATS = {*IMAGE_FORMATS, "svg"}
+
+
+def _download_url(file_id: str) -> str:
+    return f"/download/{file_id}"
+
+
+def _save_pil(image, fmt: str) -> str:
+    """Encode a PIL image straight into the returned-file store. Returns file_id."""
+    if fmt == "jpeg" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    quality = get_settings().image_quality
+    options = {"quality": quality} if fmt in ("webp", "jpeg") else {}
+    return save_returned_output(
+        lambda f: image.save(f, format=IMAGE_FORMATS[fmt], **options),
+        f"image.{fmt}",
+    )
+
+
+def _image_result(image, fmt: str) -> dict:
+    """Store image (and a downscaled preview if it is large) and describe it."""
+    width, height = image.size
+    file_id = _save_pil(image, fmt)
+    result = {
+        "type": "image",
+        "url": _download_url(file_id),
+        "file_id": file_id,
+        "filename": f"image.{fmt}",
+        "width": width,
+        "height": height,
+    }
+
+    preview_size = get_settings().image_preview_size
+    if preview_size is not None and max(width, height) > preview_size:
+        preview = image.copy()
+        preview.thumbnail((preview_size, preview_size))
+        result["full_url"] = result["url"]
+        result["url"] = _download_url(_save_pil(preview, fmt))
+        preview.close()
+
+    return result
+
+
+def store_pil_image(image) -> dict:
+    """Store a PIL Image in the returned-file store and return an image result."""
+    try:
+        return _image_result(image, get_settings().image_format)
+    finally:
+        image.close()
+
+
+def _save_figure(figure, fmt: str, dpi: float) -> str:
+    """Render a matplotlib Figure straight into the returned-file store. Returns file_id."""
+    quality = get_settings().image_quality
+    options = {"pil_kwargs": {"quality": quality}} if fmt in ("webp", "jpeg") else {}
+    return save_returned_output(
+        lambda f: figure.savefig(f, format=fmt, dpi=dpi, bbox_inches="tight", **options),
+        f"figure.{fmt}",
+    )
+
+
+def store_figure(figure) -> dict:
+    """Store a matplotlib Figure in the returned-file store and return an image result."""
+    import matplotlib.pyplot as plt  # avoid hard dependency at import time
+
+    settings = get_settings()
+    fmt = settings.figure_format or settings.image_format
+    preview_size = settings.image_preview_size
+    try:
+        dpi = figure.get_dpi()
+        file_id = _save_figure(figure, fmt, dpi)
+        result = {
+            "type": "image",
+            "url": _download_url(file_id),
+            "file_id": file_id,
+            "filename": f"figure.{fmt}",
+        }
+
+        # SVG scales freely; raster figures get a lower-dpi preview when large.
+        longest = max(figure.get_size_inches()) * dpi
+        if fmt != "svg" and preview_size is not None and longest > preview_size:
+            result["full_url"] = result["url"]
+            preview_id = _save_figure(figure, fmt, dpi * preview_size / longest)
+            result["url"] = _download_url(preview_id)
+
+        return result
+    finally:
+        plt.close(figure)
@@ -0,0 +1,172 @@
+import os
+import re
+import ast
+import json
+import uuid
+import importlib
+import importlib.util
+import threading
+from pathlib import Path
+from typing import Any, Callable
+
+_IMPORT_STRING_RE = re.compile(r"^[A-Za-z_][\w.]*:[A-Za-z_][\w.]*$")
+
+
+def is_import_string(value: Any) -> bool:
+    """True for "package.module:function" strings."""
+    return isinstance(value, str) and bool(_IMPORT_STRING_RE.match(value))
+
+
+def split_import_string(import_string: str) -> tuple[str, str]:
+    """Split "package.module:function" into (module, attribute path)."""
+    if not is_import_string(import_string):
+        raise ValueError(
+            f"Invalid import string '{import_string}'. Expected 'package.module:function'."
+        )
+    module, _, attr = import_string.partition(":")
+    return module, attr
+
+
+def import_function(import_string: str) -> Callable[..., Any]:
+    """Import the module of an import string and return the function."""
+    module_name, attr = split_import_string(import_string)
+    obj = importlib.import_module(module_name)
+    for part in attr.split("."):
+        obj = getattr(obj, part)
+    if not callable(obj):
+        raise TypeError(f"'{import_string}' is not callable, got {type(obj).__name__}")
+    return obj
+
+
+def _module_source(module_name: str) -> str | None:
+    """Path of a module's .py source, found without executing the module.
+
+    Parent packages are imported (their __init__), the module itself is not.
+    """
+    try:
+        spec = importlib.util.find_spec(module_name)
+    except (ImportError, ValueError):
+        return None
+    if spec is None or not spec.origin or not spec.origin.endswith(".py"):
+        return None
+    return spec.origin
+
+
+def _read_docstring(source: str, attr: str) -> str:
+    """Docstring of a top-level (or class-nested) def, parsed from source."""
+    with open(source, "rb") as f:
+        tree = ast.parse(f.read(), filename=source)
+
+    body = tree.body
+    node = None
+    for part in attr.split("."):
+        node = next(
+            (n for n in body
+             if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))
+             and n.name == part),
+            None,
+        )
+        if node is None:
+            return ""
+        body = node.body
+
+    doc = ast.get_docstring(node)
+    return doc.strip() if doc else ""
+
+
+class FunctionManifest:
+    """JSON cache of import-string functions, so they can be listed without importing.
+
+    Keyed by import string; each entry records the module source path with its
+    mtime and size, the description, and, once the function has been imported
+    once, its serialized parameters (used by /doc). Entries whose source has
+    changed are ignored and refreshed.
+
+    With path=None the cache only lives in memory.
+    """
+
+    def __init__(self, path: str | Path | None = None):
+        self.path = Path(path) if path is not None else None
+        self._entries: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+
+        if self.path is not None and self.path.is_file():
+            try:
+                self._entries = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                self._entries = {}
+
+    def _fresh(self, import_string: str) -> dict | None:
+        entry = self._entries.get(import_string)
+        if entry is None:
+            return None
+        try:
+            st = os.stat(entry["source"])
+        except (OSError, KeyError, TypeError):
+            return None
+        if st.st_mtime_ns != entry.get("mtime") or st.st_size != entry.get("size"):
+            return None
+        return entry
+
+    def _new_entry(self, import_string: str) -> dict:
+        """Describe a function from its source. Caller holds the lock."""
+        module_name, attr = split_import_string(import_string)
+        source = _module_source(module_name)
+        entry = {"source": source, "mtime": None, "size": None, "description": "", "params": None}
+
+        if source is not None:
+            st = os.stat(source)
+            entry.update(mtime=st.st_mtime_ns, size=st.st_size)
+            try:
+                entry["description"] = _read_docstring(source, attr)
+            except (OSError, SyntaxError, ValueError):
+                pass
+
+        self._entries[import_string] = entry
+        self._dirty = True
+        return entry
+
+    def describe(self, import_string: str) -> str:
+        """Description (docstring) of the function, without importing its module."""
+        with self._lock:
+            entry = self._fresh(import_string) or self._new_entry(import_string)
+            return entry["description"]
+
+    def get_params(self, import_string: str) -> list[dict] | None:
+        """Serialized parameters recorded by record_params, if still valid."""
+        with self._lock:
+            entry = self._fresh(import_string)
+            return entry["params"] if entry is not None else None
+
+    def record_params(self, import_string: str, params: list[dict]) -> None:
+        """Store the parameters of a function that has just been imported."""
+        with self._lock:
+            entry = self._fresh(import_string) or self._new_entry(import_string)
+            if entry["params"] == params:
+                return
+            entry["params"] = params
+            self._dirty = True
+        self.save()
+
+    def save(self) -> None:
+        """Write the manifest if it changed (atomic replace; last writer wins)."""
+        if self.path is None:
+            return
+
+        with self._lock:
+            if not self._dirty:
+                return
+            data = json.dumps(self._entries, sort_keys=True, default=str)
+            self._dirty = False
+
+        tmp = self.path.with_name(f".{self.path.name}.{uuid.uuid4().hex}")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp.write_text(data, encoding="utf-8")
+            os.replace(tmp, self.path)
+        except OSError:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
@@ -2,6 +2,8 @@ from typing import Any, Callable
 from pathlib import Path
 
 from ..models import FunctionMetadata, NormalizedInput
+from .lazy_import import FunctionManifest
+from .resources import ResourceRegistry
 from .utils import slugify, detect_input_type, encode_favicon_to_base64, validate_css_vars
 
 
@@ -10,9 +12,16 @@ def normalize_input(
     app_title: str | None = None,
     css_vars: dict[str, str] | None = None,
     favicon: str | Path | None = None,
-    default_title: str = "Tools"
+    default_title: str = "Tools",
+    manifest: FunctionManifest | None = None,
+    resources: ResourceRegistry | None = None
 ) -> NormalizedInput:
-    """Normalize user input into the internal app config."""
+    """Normalize user input into the internal app config.
+
+    Functions given as import strings are described from the manifest (or
+    their module source) without being imported. Eager resources of
+    individual functions are registered with the app's resources.
+    """
     validate_css_vars(css_vars)
 
     input_type = detect_input_type(user_input)
@@ -37,6 +46,24 @@ def normalize_input(
     else:
         config["items"] = normalize_items(user_input)
 
+    if manifest is None:
+        manifest = FunctionManifest()
+    config["manifest"] = manifest
+
+    if resources is None:
+        resources = ResourceRegistry()
+    config["resources"] = resources
+
+    functions = (
+        [config["single_function"]] if config["single_function"]
+        else get_all_functions(config["items"])
+    )
+    for meta in functions:
+        if meta.description is None:
+            meta.description = manifest.describe(meta.import_string)
+        resources.include(meta.resources)
+    manifest.save()
+
     return NormalizedInput(**config)
 
 
@@ -0,0 +1,181 @@
+import os
+import asyncio
+import inspect
+from contextlib import AsyncExitStack, asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from typing import Annotated, Any, Callable, get_args, get_origin, get_type_hints
+
+
+@dataclass(eq=False)
+class Resource:
+    """A shared object created once per worker and injected into functions.
+
+    Functions receive it through a parameter annotated with the type it is
+    registered under, and that parameter is left out of the form:
+
+        def load_model() -> Model: ...
+
+        def predict(text: str, model: Model) -> str: ...
+
+        run(predict, resources={Model: load_model})
+
+    `factory` may be sync or async. A (async) generator factory yields the
+    instance and is resumed on shutdown to dispose of it, like a context
+    manager; otherwise `dispose(instance)` is called if given. Sync factories
+    and disposers run in a thread.
+
+    Resources are created on first use unless `eager=True`, which creates
+    them when the worker starts.
+    """
+    factory: Callable[[], Any]
+    eager: bool = False
+    dispose: Callable[[Any], Any] | None = None
+
+    def __post_init__(self):
+        if not callable(self.factory):
+            raise TypeError(f"Resource factory must be callable, got {type(self.factory).__name__}")
+        if self.dispose is not None and not callable(self.dispose):
+            raise TypeError(f"Resource dispose must be callable, got {type(self.dispose).__name__}")
+
+
+def normalize_resources(resources: dict | None) -> dict[Any, Resource]:
+    """{annotation: Resource} from a mapping of annotations to Resources or factories."""
+    if resources is None:
+        return {}
+    if not isinstance(resources, dict):
+        raise TypeError(f"resources must be a dict, got {type(resources).__name__}")
+
+    normalized = {}
+    for key, value in resources.items():
+        try:
+            hash(key)
+        except TypeError:
+            raise TypeError(f"Resource key must be a type, got {key!r}") from None
+        normalized[key] = value if isinstance(value, Resource) else Resource(value)
+    return normalized
+
+
+def _strip_annotated(annotation):
+    if get_origin(annotation) is Annotated:
+        return get_args(annotation)[0]
+    return annotation
+
+
+async def _maybe_await(value):
+    if inspect.isawaitable(value):
+        return await value
+    return value
+
+
+class ResourceRegistry:
+    """Resources of one app and the instances created in the current worker.
+
+    Instances live until close(). A registry used again after fork starts
+    empty in the child, so workers never share connections or handles.
+    """
+
+    def __init__(self, resources: dict | None = None):
+        self.resources = normalize_resources(resources)
+        self._eager: list[Resource] = [r for r in self.resources.values() if r.eager]
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._instances: dict[Resource, Any] = {}
+        self._stack = AsyncExitStack()
+        self._lock: asyncio.Lock | None = None
+
+    def include(self, resources: dict[Any, Resource]) -> None:
+        """Register the eager resources of a function (created by start())."""
+        self._eager.extend(r for r in resources.values() if r.eager and r not in self._eager)
+
+    def injected(self, func: Callable[..., Any], overrides: dict[Any, Resource] | None = None) -> dict[str, Resource]:
+        """Parameters of func filled by a resource: {param_name: Resource}.
+
+        overrides (the function's own resources) take precedence over the app's.
+        """
+        available = {**self.resources, **(overrides or {})}
+        if not available:
+            return {}
+
+        try:
+            hints = get_type_hints(func, include_extras=True)
+        except Exception:
+            return {}
+
+        injected = {}
+        for name in inspect.signature(func).parameters:
+            if name not in hints:
+                continue
+            annotation = _strip_annotated(hints[name])
+            try:
+                resource = available.get(annotation)
+            except TypeError:  # unhashable annotation
+                continue
+            if resource is not None:
+                injected[name] = resource
+        return injected
+
+    async def get(self, resource: Resource) -> Any:
+        """Instance of a resource in this worker, creating it on first use."""
+        if self._pid != os.getpid():
+            self._reset()
+
+        try:
+            return self._instances[resource]
+        except KeyError:
+            pass
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if resource not in self._instances:
+                self._instances[resource] = await self._create(resource)
+        return self._instances[resource]
+
+    async def resolve(self, injected: dict[str, Resource]) -> dict[str, Any]:
+        """Keyword arguments for the injected parameters of a call."""
+        return {name: await self.get(resource) for name, resource in injected.items()}
+
+    async def _create(self, resource: Resource) -> Any:
+        factory = resource.factory
+
+        if inspect.isasyncgenfunction(factory):
+            return await self._stack.enter_async_context(asynccontextmanager(factory)())
+
+        if inspect.isgeneratorfunction(factory):
+            cm = contextmanager(factory)()
+            value = await asyncio.to_thread(cm.__enter__)
+            self._stack.push_async_callback(asyncio.to_thread, cm.__exit__, None, None, None)
+            return value
+
+        if inspect.iscoroutinefunction(factory):
+            value = await factory()
+        else:
+            value = await _maybe_await(await asyncio.to_thread(factory))
+
+        if resource.dispose is not None:
+            self._stack.push_async_callback(self._dispose, resource.dispose, value)
+        return value
+
+    @staticmethod
+    async def _dispose(dispose: Callable[[Any], Any], value: Any) -> None:
+        if inspect.iscoroutinefunction(dispose):
+            await dispose(value)
+        else:
+            await asyncio.to_thread(dispose, value)
+
+    async def start(self) -> None:
+        """Create the eager resources (startup of each worker)."""
+        for resource in self._eager:
+            await self.get(resource)
+
+    async def close(self) -> None:
+        """Dispose of every instance, newest first (shutdown of each worker)."""
+        if self._pid != os.getpid():
+            self._reset()
+            return
+
+        stack = self._stack
+        self._reset()
+        await stack.aclose()
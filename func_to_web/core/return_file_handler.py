@@ -1,11 +1,128 @@
 import os
+import gzip
 import time
 import uuid
+import heapq
+import asyncio
+import shutil
+import zipfile
+import mimetypes
 import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
 from pathlib import Path
+from typing import Any, BinaryIO, Callable
 
-RETURNS_DIR = Path("./returned_files")
-RETURNS_LIFETIME_SECONDS: int = 3600
+import aiofiles
+
+from .settings import Settings, get_settings
+from .storage import Storage, LocalStorage
+from ..types import FileResponse
+
+STREAM_CHUNK_SIZE = 1024 * 1024
+_PARTIAL_PREFIX = ".partial-"
+
+# Text-like downloads at least this big get a gzip variant in a .gzip folder
+# next to the file (local storage only).
+GZIP_MIN_SIZE = 32 * 1024
+_GZIP_DIR_NAME = ".gzip"
+_COMPRESSIBLE_TYPES = {
+    "application/json",
+    "application/xml",
+    "application/javascript",
+    "application/x-ndjson",
+    "image/svg+xml",
+}
+# Compressions run on a small shared pool, so a burst of first downloads of
+# many files doesn't start a thread per file. Created lazily in each process.
+GZIP_WORKERS = 2
+_gzip_pending: set[str] = set()
+_gzip_lock = threading.Lock()
+_gzip_executor: ThreadPoolExecutor | None = None
+_gzip_executor_pid: int | None = None
+
+# The quota re-lists the storage at most this often, to account for files
+# written or deleted by other processes sharing it.
+QUOTA_SYNC_INTERVAL = 1.0
+
+
+class _FileIndex:
+    """In-memory index of one app's returned files.
+
+    Each Settings (each app built by create_app) has its own index, storage
+    and cleanup thread, so apps sharing a process never see each other's files.
+    Indexes don't survive fork; each process builds its own on first use.
+    """
+
+    def __init__(self, settings: Settings):
+        self.pid = os.getpid()
+        self.settings = settings
+        self.storage: Storage = settings.storage
+
+        # file_id → {"key", "path", "filename", "size", "timestamp"}; the storage
+        # stays the source of truth, the index only avoids listing it per download.
+        # Ordered from least to most recently used, for quota eviction.
+        self.entries: OrderedDict[str, dict] = OrderedDict()
+        self.bytes = 0
+
+        # (expires_at, file_id), popped by the cleanup thread exactly when due.
+        # Entries for files already gone are skipped lazily.
+        self.expiry_heap: list[tuple[int, str]] = []
+
+        # Guards entries, the heap and bytes; notified when a file is added
+        # so the cleanup thread can recompute its next wake-up.
+        self.lock = threading.Condition()
+        self.cleanup_thread: threading.Thread | None = None
+
+        # storage.change_token() when the index last listed the storage.
+        self.synced_token: Any = None
+        # time.monotonic() of the last listing made for the quota.
+        self.quota_synced_at = float("-inf")
+
+
+_indexes: dict[Settings, _FileIndex] = {}
+_indexes_lock = threading.Lock()
+
+# Called with the ID of every file dropped from an index (expired, evicted or
+# deleted), so state derived from it, like paged-table offsets, goes too.
+_removal_listeners: list[Callable[[str], None]] = []
+
+
+def on_file_removed(listener: Callable[[str], None]) -> Callable[[str], None]:
+    """Register listener(file_id) for returned files leaving the index. Usable as a decorator."""
+    _removal_listeners.append(listener)
+    return listener
+
+# Listing left by cleanup_returned_files() as (pid, change token, [(key, size)]),
+# taken over by the first index load in the same process so that startup lists
+# the storage once. A forked worker ignores its parent's listing.
+_swept_listings: dict[Settings, tuple[int, Any, list[tuple[str, int]]]] = {}
+if hasattr(os, "register_at_fork"):
+    # A supervisor sweeps before forking and never loads an index itself.
+    os.register_at_fork(before=_swept_listings.clear)
+
+
+def _index_for(settings: Settings | None = None) -> _FileIndex:
+    """Index of the given settings, or of the app serving the current request.
+
+    Created on first use in each process: loaded from the storage listing,
+    with its cleanup thread started.
+    """
+    settings = settings or get_settings()
+    index = _indexes.get(settings)
+    if index is not None and index.pid == os.getpid():
+        return index
+
+    with _indexes_lock:
+        index = _indexes.get(settings)
+        if index is not None and index.pid == os.getpid():
+            return index
+        index = _FileIndex(settings)
+        _load_index(index)
+        _start_cleanup(index)
+        _indexes[settings] = index
+    return index
 
 
 def _encode_filename(file_id: str, timestamp: int, filename: str) -> str:
@@ -23,87 +140,611 @@ def _decode_filename(name: str) -> dict | None:
         return None
 
 
+def get_storage() -> Storage:
+    """Backend for returned files of the current app."""
+    return get_settings().storage
+
+
+def _make_entry(storage: Storage, key: str, meta: dict, size: int) -> dict:
+    return {
+        "key": key,
+        "path": storage.local_path(key),
+        "filename": meta["filename"],
+        "size": size,
+        "timestamp": meta["timestamp"],
+    }
+
+
+def _add_entry(index: _FileIndex, file_id: str, entry: dict) -> None:
+    """Insert an entry into the index and schedule its expiry. Caller holds the lock."""
+    old = index.entries.pop(file_id, None)
+    if old is not None:
+        index.bytes -= old["size"]
+
+    index.entries[file_id] = entry
+    index.bytes += entry["size"]
+    heapq.heappush(
+        index.expiry_heap,
+        (entry["timestamp"] + index.settings.returns_lifetime, file_id),
+    )
+    index.lock.notify()
+
+
+def _remove_entry(index: _FileIndex, file_id: str) -> dict | None:
+    """Drop an entry from the index. Caller holds the lock."""
+    entry = index.entries.pop(file_id, None)
+    if entry is not None:
+        index.bytes -= entry["size"]
+        for listener in _removal_listeners:
+            listener(file_id)
+    return entry
+
+
+def _delete_file(path: str) -> None:
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+def _gzip_variant_path(path: str) -> Path:
+    p = Path(path)
+    return p.parent / _GZIP_DIR_NAME / f"{p.name}.gz"
+
+
+def _delete_stored(storage: Storage, entry: dict) -> None:
+    """Delete a stored file together with its gzip variant, if any."""
+    storage.delete(entry["key"])
+    if entry["path"] is not None:
+        _delete_file(str(_gzip_variant_path(entry["path"])))
+
+
+def rebuild_index() -> int:
+    """Rebuild the current app's index from the storage listing.
+
+    Indexes are built on first use; call this at startup to pay for the
+    listing before the first request instead.
+
+    Returns:
+        Number of indexed files.
+    """
+    settings = get_settings()
+    index = _indexes.get(settings)
+    if index is None or index.pid != os.getpid():
+        # Loaded on creation; don't list the storage a second time.
+        return len(_index_for(settings).entries)
+    return _load_index(index)
+
+
+def _list_storage(settings: Settings) -> tuple[Any, list[tuple[str, int]]]:
+    swept = _swept_listings.pop(settings, None)
+    if swept is not None and swept[0] == os.getpid():
+        return swept[1], swept[2]
+
+    storage = settings.storage
+    # Read before listing: a file added meanwhile changes the token again.
+    token = storage.change_token()
+    return token, list(storage.list())
+
+
+def _load_index(index: _FileIndex) -> int:
+    storage = index.storage
+    token, listing = _list_storage(index.settings)
+    entries = []
+    for key, size in listing:
+        meta = _decode_filename(key)
+        if meta:
+            entries.append((meta["file_id"], _make_entry(storage, key, meta, size)))
+
+    # Oldest first, so they are the first evicted when over quota.
+    entries.sort(key=lambda item: item[1]["timestamp"])
+
+    with index.lock:
+        index.entries.clear()
+        index.expiry_heap.clear()
+        index.bytes = 0
+        for file_id, entry in entries:
+            _add_entry(index, file_id, entry)
+        index.synced_token = token
+
+    _enforce_quota(index)
+
+    return len(entries)
+
+
+def _sync_for_quota(index: _FileIndex) -> None:
+    """Bring the index in line with the storage shared with other processes.
+
+    Files written by other workers since the last listing are added as the
+    most recently used (oldest first) and files they deleted are dropped, so the quota counts the whole
+    store rather than this process's files. Throttled by QUOTA_SYNC_INTERVAL
+    and skipped when the change token shows nothing was written since.
+    """
+    now = time.monotonic()
+    token = index.storage.change_token()
+    with index.lock:
+        if now - index.quota_synced_at < QUOTA_SYNC_INTERVAL:
+            return
+        if token is not None and token == index.synced_token:
+            return
+        index.quota_synced_at = now
+        known = set(index.entries)
+
+    storage = index.storage
+    listed = {}
+    for key, size in storage.list():
+        meta = _decode_filename(key)
+        if meta:
+            listed[meta["file_id"]] = _make_entry(storage, key, meta, size)
+
+    with index.lock:
+        # Files saved while listing may be missing from it; keep those.
+        for file_id in known - listed.keys():
+            _remove_entry(index, file_id)
+
+        new = [(file_id, entry) for file_id, entry in listed.items() if file_id not in index.entries]
+        new.sort(key=lambda item: item[1]["timestamp"])
+        for file_id, entry in new:
+            _add_entry(index, file_id, entry)
+        if token is not None:
+            index.synced_token = token
+
+
+def _enforce_quota(index: _FileIndex, keep: str | None = None) -> int:
+    """Evict least recently used files until the store fits returns_max_bytes.
+
+    The file given in `keep` (the one just saved) is never evicted, even if it
+    alone exceeds the quota. The limit applies to the storage as a whole, also
+    when several workers share it; recency is what this process has seen.
+
+    Returns:
+        Number of files evicted.
+    """
+    max_bytes = index.settings.returns_max_bytes
+    if max_bytes is None:
+        return 0
+
+    _sync_for_quota(index)
+
+    evicted = []
+    with index.lock:
+        for file_id in list(index.entries):
+            if index.bytes <= max_bytes:
+                break
+            if file_id == keep:
+                continue
+            evicted.append(_remove_entry(index, file_id))
+
+    for entry in evicted:
+        _delete_stored(index.storage, entry)
+
+    return len(evicted)
+
+
+def _find_in_storage(index: _FileIndex, file_id: str) -> dict | None:
+    """Slow path for files written by another process after the index was built.
+
+    When the storage has a change token, the listing is skipped entirely if
+    nothing was added since the index last listed it (so unknown or expired
+    IDs cost a stat), and otherwise every new file is indexed in one pass.
+    """
+    storage = index.storage
+    token = storage.change_token()
+    if token is None:
+        for key, size in storage.list(prefix=f"{file_id}___"):
+            meta = _decode_filename(key)
+            if meta and meta["file_id"] == file_id:
+                return _make_entry(storage, key, meta, size)
+        return None
+
+    with index.lock:
+        if token == index.synced_token:
+            return None
+
+    found = []
+    expired_before = time.time() - index.settings.returns_lifetime
+    for key, size in storage.list():
+        meta = _decode_filename(key)
+        # Expired files may still be listed while the cleanup deletes them.
+        if meta and meta["timestamp"] > expired_before:
+            found.append((meta["file_id"], _make_entry(storage, key, meta, size)))
+
+    with index.lock:
+        for found_id, entry in found:
+            if found_id not in index.entries:
+                _add_entry(index, found_id, entry)
+        index.synced_token = token
+        entry = index.entries.get(file_id)
+    return dict(entry) if entry is not None else None
+
+
+def _write_sync_stream(stream, path: Path) -> None:
+    """Write a sync iterator or file-like object to path, one chunk at a time."""
+    with open(path, "wb") as f:
+        if hasattr(stream, "read"):
+            while chunk := stream.read(STREAM_CHUNK_SIZE):
+                f.write(chunk)
+        else:
+            for chunk in stream:
+                f.write(chunk)
+
+
+async def write_stream(stream) -> str:
+    """Write a byte stream to a partial file inside the returns directory.
+
+    Async iterators are consumed on the event loop; sync iterators and
+    file-like objects are drained in a worker thread so they never block it.
+
+    Returns:
+        Path of the partial file, to be moved into place by save_returned_file.
+    """
+    returns_dir = get_settings().returns_dir
+    returns_dir.mkdir(parents=True, exist_ok=True)
+    path = returns_dir / f"{_PARTIAL_PREFIX}{uuid.uuid4().hex}"
+
+    try:
+        if hasattr(stream, "__aiter__"):
+            async with aiofiles.open(path, "wb") as f:
+                async for chunk in stream:
+                    await f.write(chunk)
+        else:
+            await asyncio.to_thread(_write_sync_stream, stream, path)
+    except BaseException:
+        _delete_file(str(path))
+        raise
+
+    return str(path)
+
+
+def _save_partial(write: Callable[[Path], None], filename: str) -> str:
+    """Run write(path) on a fresh partial file and move the result into storage."""
+    returns_dir = get_settings().returns_dir
+    returns_dir.mkdir(parents=True, exist_ok=True)
+    path = returns_dir / f"{_PARTIAL_PREFIX}{uuid.uuid4().hex}"
+
+    try:
+        write(path)
+        file_id, _ = save_returned_file(
+            FileResponse(path=str(path), filename=filename, move=True)
+        )
+    except BaseException:
+        _delete_file(str(path))
+        raise
+
+    return file_id
+
+
+def save_returned_stream(chunks, filename: str) -> str:
+    """Save an iterator of bytes chunks as a returned file, without buffering it.
+
+    Sync counterpart of write_stream for results produced inside process_result.
+
+    Returns:
+        file_id
+    """
+    return _save_partial(lambda path: _write_sync_stream(chunks, path), filename)
+
+
+def save_returned_output(write: Callable[[BinaryIO], None], filename: str) -> str:
+    """Save a returned file produced by write(f), e.g. lambda f: image.save(f, "PNG").
+
+    The writer encodes straight to disk, so no intermediate buffer is kept.
+
+    Returns:
+        file_id
+    """
+    def write_path(path: Path) -> None:
+        with open(path, "wb") as f:
+            write(f)
+
+    return _save_partial(write_path, filename)
+
+
 def save_returned_file(file_response) -> tuple[str, str]:
-    """Save a FileResponse to disk.
+    """Save a FileResponse to the returned-file storage.
+
+    Path-based responses are handed to Storage.put_file, which streams them
+    (or, for local storage, reflinks/moves them) without loading them in memory.
 
     Returns:
-        (file_id, file_path)
+        (file_id, storage key)
     """
+    index = _index_for()
+    storage = index.storage
+    file_id = uuid.uuid4().hex
+    timestamp = int(time.time())
+    key = _encode_filename(file_id, timestamp, file_response.filename)
+
     if file_response.path is not None:
-        data = Path(file_response.path).read_bytes()
+        size = os.path.getsize(file_response.path)
+        storage.put_file(file_response.path, key, move=file_response.move)
     else:
-        data = file_response.data
+        with storage.open_write(key) as f:
+            f.write(file_response.data)
+        size = len(file_response.data)
 
-    file_id = uuid.uuid4().hex
-    timestamp = int(time.time())
-    encoded = _encode_filename(file_id, timestamp, file_response.filename)
-    file_path = RETURNS_DIR / encoded
+    meta = {"file_id": file_id, "timestamp": timestamp, "filename": file_response.filename}
+    with index.lock:
+        _add_entry(index, file_id, _make_entry(storage, key, meta, size))
 
-    RETURNS_DIR.mkdir(parents=True, exist_ok=True)
-    file_path.write_bytes(data)
+    _enforce_quota(index, keep=file_id)
 
-    return file_id, str(file_path)
+    return file_id, key
 
 
 def get_returned_file(file_id: str) -> dict | None:
-    """Find a returned file by file_id.
+    """Find a returned file by file_id (O(1) index lookup).
+
+    Marks the file as recently used for quota eviction.
 
     Returns:
-        {"path": str, "filename": str} or None if not found.
+        {"key": str, "path": str | None, "filename": str, "size": int,
+        "timestamp": int} or None if not found. "path" is None for
+        non-local storage.
     """
-    if not RETURNS_DIR.exists():
+    index = _index_for()
+    with index.lock:
+        entry = index.entries.get(file_id)
+        if entry is not None:
+            index.entries.move_to_end(file_id)
+
+    if entry is None:
+        entry = _find_in_storage(index, file_id)
+        if entry is None:
+            return None
+        with index.lock:
+            if file_id not in index.entries:
+                _add_entry(index, file_id, entry)
+
+    # Only local files are re-checked; a remote round trip per lookup would
+    # defeat the index.
+    if entry["path"] is not None and not os.path.isfile(entry["path"]):
+        with index.lock:
+            _remove_entry(index, file_id)
         return None
 
-    for p in RETURNS_DIR.iterdir():
-        if not p.is_file():
-            continue
-        meta = _decode_filename(p.name)
-        if meta and meta["file_id"] == file_id:
-            return {"path": str(p), "filename": meta["filename"]}
+    return dict(entry)
 
-    return None
+
+class _ZipSink:
+    """Write-only, unseekable buffer that zipfile streams into.
+
+    zipfile falls back to data descriptors when the target cannot seek, so the
+    archive can be emitted front to back without a temporary file.
+    """
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _unique_name(filename: str, used: set[str]) -> str:
+    """Deduplicate archive member names: report.csv, report (1).csv, ..."""
+    stem, dot, ext = filename.rpartition(".")
+    if not dot:
+        stem, ext = filename, ""
+    name, n = filename, 1
+    while name in used:
+        name = f"{stem} ({n}){dot}{ext}"
+        n += 1
+    used.add(name)
+    return name
+
+
+def iter_zip_bundle(entries: list[dict]):
+    """Yield a ZIP archive of returned files chunk by chunk.
+
+    Members are stored uncompressed (most returned files are already
+    compressed), so memory stays at one STREAM_CHUNK_SIZE regardless of the
+    number or size of files.
+    """
+    # Resolved now: the generator may be consumed outside the request context.
+    return _iter_zip_bundle(get_storage(), entries)
+
+
+def _iter_zip_bundle(storage: Storage, entries: list[dict]):
+    sink = _ZipSink()
+    used: set[str] = set()
+
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED) as zf:
+        for entry in entries:
+            zinfo = zipfile.ZipInfo(
+                _unique_name(entry["filename"], used),
+                date_time=time.localtime(entry["timestamp"])[:6],
+            )
+            zinfo.file_size = entry["size"]
+
+            with closing(storage.open_read(entry["key"])) as src, zf.open(zinfo, "w") as dst:
+                while chunk := src.read(STREAM_CHUNK_SIZE):
+                    dst.write(chunk)
+                    yield sink.drain()
+            yield sink.drain()
+
+    yield sink.drain()
+
+
+def iter_returned_file(entry: dict):
+    """Yield a stored file chunk by chunk (for backends without a local path)."""
+    return _iter_stored(get_storage(), entry["key"])
+
+
+def _iter_stored(storage: Storage, key: str):
+    with closing(storage.open_read(key)) as src:
+        while chunk := src.read(STREAM_CHUNK_SIZE):
+            yield chunk
 
 
 def cleanup_returned_files() -> int:
-    """Delete returned files older than RETURNS_LIFETIME_SECONDS.
+    """Delete the current app's returned files older than returns_lifetime.
+
+    Meant for startup, possibly in a supervisor that forks workers later: it
+    doesn't create the index or its cleanup thread. The remaining files are
+    handed to the first index load in this process instead of being listed
+    again. Afterwards the cleanup thread deletes each file exactly when it
+    expires.
 
     Returns:
         Number of files deleted.
     """
-    if not RETURNS_DIR.exists():
-        return 0
-
+    settings = get_settings()
+    storage = settings.storage
+    lifetime = settings.returns_lifetime
+    returns_dir = settings.returns_dir
     now = int(time.time())
     count = 0
 
-    for p in RETURNS_DIR.iterdir():
-        if not p.is_file():
-            continue
-        meta = _decode_filename(p.name)
-        if meta and (now - meta["timestamp"]) > RETURNS_LIFETIME_SECONDS:
-            try:
-                p.unlink()
-                count += 1
-                print(f"Deleted expired returned file: {p.name}")
-            except OSError:
-                pass
+    index = _indexes.get(settings)
+    if index is not None and index.pid != os.getpid():
+        index = None
+
+    token = storage.change_token()
+    kept = []
+    for key, size in list(storage.list()):
+        meta = _decode_filename(key)
+        if meta and (now - meta["timestamp"]) > lifetime:
+            if index is not None:
+                with index.lock:
+                    _remove_entry(index, meta["file_id"])
+            storage.delete(key)
+            count += 1
+            print(f"Deleted expired returned file: {key}")
+        else:
+            kept.append((key, size))
+
+    if index is None:
+        _swept_listings[settings] = (os.getpid(), token, kept)
+
+    # Streams interrupted by a crash; never indexed.
+    if returns_dir.exists():
+        for p in returns_dir.glob(f"{_PARTIAL_PREFIX}*"):
+            if now - p.stat().st_mtime > lifetime:
+                _delete_file(str(p))
+
+    if isinstance(storage, LocalStorage):
+        gzip_dir = storage.directory / _GZIP_DIR_NAME
+        if gzip_dir.exists():
+            for p in gzip_dir.iterdir():
+                if not (storage.directory / p.name.removesuffix(".gz")).exists():
+                    _delete_file(str(p))
 
     return count
 
 
+def guess_media_type(filename: str) -> str:
+    """MIME type of a returned file, from its filename."""
+    return mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+
+def is_compressible(media_type: str, size: int) -> bool:
+    """True if a download is worth serving gzip-encoded."""
+    if size < GZIP_MIN_SIZE:
+        return False
+    return media_type.startswith("text/") or media_type in _COMPRESSIBLE_TYPES
+
+
+def _compress(path: str) -> None:
+    """Write the gzip variant of path atomically (temp file + rename)."""
+    target = _gzip_variant_path(path)
+    tmp = target.with_name(f"{_PARTIAL_PREFIX}{uuid.uuid4().hex}")
+    try:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "rb") as src, gzip.open(tmp, "wb", compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst, STREAM_CHUNK_SIZE)
+        os.replace(tmp, target)
+        # The source may have expired while compressing.
+        if not os.path.exists(path):
+            _delete_file(str(target))
+    except OSError:
+        _delete_file(str(tmp))
+    finally:
+        with _gzip_lock:
+            _gzip_pending.discard(path)
+
+
+def get_gzip_variant(path: str) -> str | None:
+    """Return the precompressed variant of a stored file, if it is ready.
+
+    The first request for a file queues its compression on a shared pool of
+    GZIP_WORKERS threads and gets None, so it is served uncompressed instead
+    of waiting. Files already queued are not queued again.
+    """
+    global _gzip_executor, _gzip_executor_pid
+
+    target = _gzip_variant_path(path)
+    if target.is_file():
+        return str(target)
+
+    with _gzip_lock:
+        if _gzip_executor_pid != os.getpid():
+            # Pool threads and pending work don't survive fork.
+            _gzip_executor = ThreadPoolExecutor(GZIP_WORKERS, thread_name_prefix="func-to-web-gzip")
+            _gzip_executor_pid = os.getpid()
+            _gzip_pending.clear()
+        if path in _gzip_pending:
+            return None
+        _gzip_pending.add(path)
+        _gzip_executor.submit(_compress, path)
+
+    return None
+
+
+def _pop_expired(index: _FileIndex) -> list[dict]:
+    """Pop every heap entry that is due. Caller holds the lock."""
+    now = time.time()
+    lifetime = index.settings.returns_lifetime
+    expired = []
+
+    while index.expiry_heap and index.expiry_heap[0][0] <= now:
+        expires_at, file_id = heapq.heappop(index.expiry_heap)
+        entry = index.entries.get(file_id)
+        # Stale heap entry: file already removed or re-added with a new expiry.
+        if entry is None or entry["timestamp"] + lifetime != expires_at:
+            continue
+        expired.append(_remove_entry(index, file_id))
+
+    return expired
+
+
 def start_cleanup_timer() -> None:
-    """Start a background thread that cleans up expired returned files every hour.
-    
-    Safe to call multiple times — only starts one thread per process.
+    """Start a background thread that deletes the current app's returned files
+    as they expire.
+
+    The thread sleeps until the earliest expiry in the heap (or until a new
+    file is saved) instead of sweeping the directory on a fixed interval.
+
+    Safe to call multiple times — only starts one thread per app and process.
     The thread is a daemon so it dies automatically when the process exits.
     """
+    _start_cleanup(_index_for())
+
+
+def _start_cleanup(index: _FileIndex) -> None:
     def _loop():
         while True:
-            time.sleep(RETURNS_LIFETIME_SECONDS)
-            try:
-                cleanup_returned_files()
-            except Exception:
-                pass
-
-    t = threading.Thread(target=_loop, daemon=True)
-    t.start()
\ No newline at end of file
+            with index.lock:
+                expired = _pop_expired(index)
+                if not expired:
+                    heap = index.expiry_heap
+                    timeout = heap[0][0] - time.time() if heap else None
+                    index.lock.wait(timeout)
+                    continue
+
+            for entry in expired:
+                _delete_stored(index.storage, entry)
+
+    with index.lock:
+        if index.cleanup_thread is not None and index.cleanup_thread.is_alive():
+            return
+        index.cleanup_thread = threading.Thread(target=_loop, daemon=True)
+        index.cleanup_thread.start()
@@ -1,14 +1,18 @@
+import os
 import uuid
+import asyncio
 from pathlib import Path
 from typing import Any
 
 import aiofiles
+import aiofiles.os
+
+from .settings import get_settings
 
 CHUNK_SIZE = 8 * 1024 * 1024
 
-UPLOADS_DIR = Path("./uploads")
-MAX_FILE_SIZE: int | None = None
-KEEP_UPLOADS: bool = False
+# Files of a single submit written to disk at the same time.
+MAX_CONCURRENT_SAVES = 8
 
 
 async def save_uploaded_file(uploaded_file: Any) -> str:
@@ -17,8 +21,12 @@ async def save_uploaded_file(uploaded_file: Any) -> str:
     if not original_name.strip():
         original_name = 'file'
 
-    folder_path = UPLOADS_DIR / uuid.uuid4().hex
-    folder_path.mkdir(parents=True, exist_ok=True)
+    settings = get_settings()
+    max_file_size = settings.max_file_size
+
+    # The owning pid lets cleanup_uploads_dir skip folders of live processes.
+    folder_path = settings.uploads_dir / f"{os.getpid()}_{uuid.uuid4().hex}"
+    await aiofiles.os.makedirs(folder_path, exist_ok=True)
     file_path = folder_path / original_name
 
     bytes_written = 0
@@ -28,10 +36,10 @@ async def save_uploaded_file(uploaded_file: Any) -> str:
             while chunk := await uploaded_file.read(CHUNK_SIZE):
                 bytes_written += len(chunk)
 
-                if MAX_FILE_SIZE is not None and bytes_written > MAX_FILE_SIZE:
+                if max_file_size is not None and bytes_written > max_file_size:
                     raise ValueError(
                         f"File too large: {bytes_written / (1024*1024):.1f} MB "
-                        f"(max: {MAX_FILE_SIZE / (1024*1024):.1f} MB)"
+                        f"(max: {max_file_size / (1024*1024):.1f} MB)"
                     )
 
                 await f.write(chunk)
@@ -42,33 +50,97 @@ async def save_uploaded_file(uploaded_file: Any) -> str:
     return str(file_path)
 
 
+async def save_uploaded_files(
+    uploaded_files: dict[str, list[Any]]
+) -> tuple[dict[str, list[str]], dict[str, str]]:
+    """Save all uploads of a submit concurrently (bounded by MAX_CONCURRENT_SAVES).
+
+    If any file fails validation, every file of the submit is removed.
+
+    Returns:
+        ({param_name: [paths]} in upload order, {param_name: error})
+    """
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_SAVES)
+
+    async def _save(uploaded_file: Any) -> str:
+        async with semaphore:
+            return await save_uploaded_file(uploaded_file)
+
+    names = list(uploaded_files)
+    results = await asyncio.gather(
+        *(asyncio.gather(*(_save(f) for f in uploaded_files[name]), return_exceptions=True)
+          for name in names)
+    )
+
+    paths: dict[str, list[str]] = {}
+    errors: dict[str, str] = {}
+    unexpected: BaseException | None = None
+
+    for name, items in zip(names, results):
+        for item in items:
+            if isinstance(item, ValueError):
+                errors.setdefault(name, str(item))
+            elif isinstance(item, BaseException):
+                unexpected = unexpected or item
+        paths[name] = [item for item in items if isinstance(item, str)]
+
+    if errors or unexpected is not None:
+        for saved in paths.values():
+            for p in saved:
+                cleanup_uploaded_file(p, force=True)
+        if unexpected is not None:
+            raise unexpected
+        return {}, errors
+
+    return paths, errors
+
+
 def cleanup_uploaded_file(file_path: str, force: bool = False) -> None:
     """Delete uploaded file and its UUID folder.
     Skips if keep_uploads is enabled unless force is True (error cleanup)."""
-    if KEEP_UPLOADS and not force:
+    if get_settings().keep_uploads and not force:
         return
 
     _remove_folder(Path(file_path).parent)
 
 
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        # Exists but belongs to another user
+        return True
+    return True
+
+
 def cleanup_uploads_dir() -> int:
-    """Remove all folders in uploads dir. Run once at startup.
-    Skips if keep_uploads is enabled."""
-    if KEEP_UPLOADS or not UPLOADS_DIR.exists():
+    """Remove leftover folders in uploads dir. Run once at startup.
+
+    Folders of processes that are still running (other workers or other
+    servers sharing the directory) are kept. Skips if keep_uploads is enabled.
+    """
+    settings = get_settings()
+    if settings.keep_uploads or not settings.uploads_dir.exists():
         return 0
 
     count = 0
-    for folder in UPLOADS_DIR.iterdir():
-        if folder.is_dir():
-            _remove_folder(folder)
-            count += 1
+    for folder in settings.uploads_dir.iterdir():
+        if not folder.is_dir():
+            continue
+        owner, _, _ = folder.name.partition("_")
+        if owner.isdigit() and int(owner) != os.getpid() and _pid_alive(int(owner)):
+            continue
+        _remove_folder(folder)
+        count += 1
 
     return count
 
 
 def _remove_folder(folder_path: Path) -> None:
     """Remove a folder and all its contents."""
-    if not folder_path.exists() or folder_path == UPLOADS_DIR:
+    if not folder_path.exists() or folder_path == get_settings().uploads_dir:
         return
 
     try:
@@ -1,11 +1,29 @@
-from typing import Any
+import os
+import time
+import random
+import select
+import signal
+import socket
+import struct
+import traceback
+from typing import Any, Callable
 from pathlib import Path
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
-import uvicorn
 
 from .constants import STATIC_DIR, UVICORN_DEFAULTS
 
+# Workers that die before serving restart after 0.5 s, 1 s, 2 s, ... up to
+# STARTUP_BACKOFF_MAX; after MAX_STARTUP_FAILURES in a row the supervisor gives up.
+STARTUP_BACKOFF = 0.5
+STARTUP_BACKOFF_MAX = 30.0
+MAX_STARTUP_FAILURES = 5
+
+# Worker → supervisor messages on a pipe: pid + kind, written atomically.
+_MESSAGE = struct.Struct("<ic")
+_READY = b"r"       # started serving
+_RETIRING = b"x"    # stopped accepting (max_requests), draining in-flight requests
+
 
 def create_fastapi_app(
     root_path: str = "",
@@ -33,13 +51,8 @@ def create_fastapi_app(
     return app
 
 
-def start_server(
-    app: FastAPI,
-    host: str,
-    port: int,
-    uvicorn_kwargs: dict[str, Any]
-) -> None:
-    """Start the Uvicorn server with merged default + user config."""
+def _server_config(host: str, port: int, uvicorn_kwargs: dict[str, Any]) -> dict[str, Any]:
+    """Merge default + user Uvicorn config."""
     config = {
         "host": host,
         "port": port,
@@ -48,8 +61,211 @@ def start_server(
 
     clean_kwargs = {k: v for k, v in uvicorn_kwargs.items() if k != "root_path"}
     config.update(clean_kwargs)
+    return config
+
+
+def start_server(
+    app: FastAPI,
+    host: str,
+    port: int,
+    uvicorn_kwargs: dict[str, Any]
+) -> None:
+    """Start the Uvicorn server with merged default + user config."""
+    import uvicorn  # deferred: create_app() alone doesn't need it
 
-    uvicorn_config = uvicorn.Config(app, **config)
+    uvicorn_config = uvicorn.Config(app, **_server_config(host, port, uvicorn_kwargs))
     server = uvicorn.Server(uvicorn_config)
 
-    server.run()
\ No newline at end of file
+    server.run()
+
+
+def _worker_rss(pid: int) -> int | None:
+    """Resident memory of a process in bytes, or None if unavailable (non-Linux)."""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _spawn_worker(
+    app: FastAPI,
+    config: dict[str, Any],
+    sock: socket.socket,
+    max_requests: int | None,
+    on_worker_start: Callable[[], None] | None,
+    notify_fd: int,
+) -> int:
+    """Fork a worker serving app on the shared socket. Returns its pid.
+
+    The worker reports on notify_fd when it starts serving and when it stops
+    accepting to drain, so the supervisor can replace it right away.
+    """
+    pid = os.fork()
+    if pid:
+        return pid
+
+    # Own process group: Ctrl+C reaches only the supervisor, which then
+    # stops workers with a single SIGTERM (a second signal would force-exit).
+    os.setpgid(0, 0)
+    code = 0
+    try:
+        if on_worker_start is not None:
+            on_worker_start()
+
+        worker_config = dict(config)
+        if max_requests:
+            # Jitter so workers don't all recycle at the same moment.
+            worker_config["limit_max_requests"] = max_requests + random.randint(0, max_requests // 10)
+
+        import uvicorn  # already imported by the supervisor
+
+        def notify(kind: bytes) -> None:
+            try:
+                os.write(notify_fd, _MESSAGE.pack(os.getpid(), kind))
+            except OSError:
+                pass
+
+        class WorkerServer(uvicorn.Server):
+            _reported: bytes | None = None
+
+            async def on_tick(self, counter: int) -> bool:
+                should_exit = await super().on_tick(counter)
+                if not self._reported:
+                    self._reported = _READY
+                    notify(_READY)
+                if should_exit and self._reported != _RETIRING:
+                    self._reported = _RETIRING
+                    notify(_RETIRING)
+                return should_exit
+
+        server = WorkerServer(uvicorn.Config(app, **worker_config))
+        server.run(sockets=[sock])
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+    finally:
+        os._exit(code)
+
+
+def start_workers(
+    app: FastAPI,
+    host: str,
+    port: int,
+    uvicorn_kwargs: dict[str, Any],
+    workers: int,
+    max_requests: int | None = None,
+    max_memory: int | None = None,
+    on_worker_start: Callable[[], None] | None = None,
+) -> None:
+    """Serve app from several forked workers sharing one listening socket.
+
+    The supervisor keeps `workers` processes serving. A worker that reaches
+    max_requests stops accepting and exits once its in-flight requests (SSE
+    streams included) finish, and is replaced as soon as it stops accepting;
+    one above max_memory bytes of RSS is replaced first and then shut down
+    gracefully. The socket stays open in the supervisor, so connections queue
+    instead of being refused meanwhile.
+
+    Workers that die before serving are restarted with exponential backoff;
+    after MAX_STARTUP_FAILURES in a row, RuntimeError is raised.
+
+    on_worker_start runs in every worker right after fork.
+    """
+    if not hasattr(os, "fork"):
+        raise RuntimeError("workers > 1 requires os.fork (Linux or macOS)")
+
+    import uvicorn  # deferred: create_app() alone doesn't need it
+
+    config = _server_config(host, port, uvicorn_kwargs)
+    sock = uvicorn.Config(app, **config).bind_socket()
+
+    children: set[int] = set()
+    retiring: set[int] = set()
+    ready: set[int] = set()
+    failures = 0
+    next_spawn = 0.0
+    stopping = False
+
+    notify_r, notify_w = os.pipe()
+    os.set_blocking(notify_r, False)
+    pending = b""
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    def spawn():
+        children.add(_spawn_worker(app, config, sock, max_requests, on_worker_start, notify_w))
+
+    print(f"Starting {workers} worker{'s' if workers != 1 else ''} (supervisor pid {os.getpid()})")
+    try:
+        while not stopping:
+            try:
+                pending += os.read(notify_r, 65536)
+            except BlockingIOError:
+                pass
+            while len(pending) >= _MESSAGE.size:
+                pid, kind = _MESSAGE.unpack_from(pending)
+                pending = pending[_MESSAGE.size:]
+                if pid not in children:
+                    continue
+                if kind == _READY:
+                    ready.add(pid)
+                    failures = 0
+                elif kind == _RETIRING:
+                    retiring.add(pid)
+
+            while True:
+                try:
+                    pid, _ = os.waitpid(-1, os.WNOHANG)
+                except ChildProcessError:
+                    break
+                if pid == 0:
+                    break
+                children.discard(pid)
+                retiring.discard(pid)
+                if pid in ready:
+                    ready.discard(pid)
+                elif not stopping:
+                    failures += 1
+                    if failures >= MAX_STARTUP_FAILURES:
+                        raise RuntimeError(
+                            f"{failures} workers in a row exited before serving; giving up"
+                        )
+                    delay = min(STARTUP_BACKOFF * 2 ** (failures - 1), STARTUP_BACKOFF_MAX)
+                    next_spawn = time.monotonic() + delay
+                    print(f"Worker {pid} exited during startup; restarting in {delay:g} s")
+
+            while len(children - retiring) < workers and not stopping and time.monotonic() >= next_spawn:
+                spawn()
+
+            if max_memory is not None:
+                for pid in children - retiring:
+                    rss = _worker_rss(pid)
+                    if rss is not None and rss > max_memory:
+                        retiring.add(pid)
+                        spawn()
+                        os.kill(pid, signal.SIGTERM)
+
+            try:
+                select.select([notify_r], [], [], 0.5)
+            except InterruptedError:
+                pass
+    finally:
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in children:
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+        os.close(notify_r)
+        os.close(notify_w)
+        sock.close()
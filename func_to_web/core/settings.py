@@ -0,0 +1,72 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from pathlib import Path
+
+from .storage import Storage, LocalStorage
+
+
+@dataclass(eq=False)
+class Settings:
+    """Configuration of one FuncToWeb app, built by create_app().
+
+    The settings of the app handling a request are returned by get_settings()
+    anywhere inside that request, including worker threads, so several apps
+    can share a process without sharing configuration.
+    """
+    uploads_dir: Path = Path("./uploads")
+    max_file_size: int | None = None
+    keep_uploads: bool = False
+    returns_dir: Path = Path("./returned_files")
+    storage: Storage | None = None      # None = LocalStorage(returns_dir)
+    returns_lifetime: int = 3600
+    returns_max_bytes: int | None = None
+    stream_prints: bool = True
+    max_inline_size: int | None = 5 * 1024 * 1024
+    image_format: str = "png"           # "png", "webp" or "jpeg"
+    image_quality: int = 85             # webp/jpeg quality, 1-100
+    figure_format: str | None = None    # matplotlib; None = image_format, or "svg"
+    image_preview_size: int | None = 1280
+
+    def __post_init__(self):
+        self.uploads_dir = Path(self.uploads_dir)
+        self.returns_dir = Path(self.returns_dir)
+        if self.storage is None:
+            self.storage = LocalStorage(self.returns_dir)
+
+
+_current: ContextVar[Settings] = ContextVar("func_to_web_settings", default=Settings())
+
+
+def get_settings() -> Settings:
+    """Settings of the app serving the current request (defaults outside one)."""
+    return _current.get()
+
+
+@contextmanager
+def use_settings(settings: Settings):
+    """Make settings current for the enclosed block."""
+    token = _current.set(settings)
+    try:
+        yield settings
+    finally:
+        _current.reset(token)
+
+
+class SettingsMiddleware:
+    """Pure ASGI middleware that makes an app's settings current for its requests.
+
+    Context variables are copied into tasks and threads started by the
+    request, so streamed responses and sync functions see them too.
+    """
+
+    def __init__(self, app, settings: Settings):
+        self.app = app
+        self.settings = settings
+
+    async def __call__(self, scope, receive, send):
+        token = _current.set(self.settings)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current.reset(token)
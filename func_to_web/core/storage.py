@@ -0,0 +1,302 @@
+import io
+import os
+import errno
+import shutil
+import time
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager, closing
+from pathlib import Path
+from typing import Any, BinaryIO, Iterator
+
+# Directory mtimes younger than this may not reflect a file created just now
+# (coarse filesystem clocks), so they aren't trusted as a change token.
+_MTIME_SETTLE_NS = 50_000_000
+
+
+class Storage(ABC):
+    """Flat key → bytes store for returned files.
+
+    Keys are the encoded "<file_id>___<timestamp>___<filename>" names, so the
+    index can be rebuilt from `list()` alone, with no separate metadata store.
+
+    Subclasses implement `open_write`, `open_read`, `delete` and `list`.
+    `put_file`, `local_path` and `url` have generic defaults and are overridden
+    when the backend can do better (zero-copy, direct downloads).
+
+    `per_process` backends keep objects inside the process that wrote them
+    and can't serve an app with several workers.
+    """
+
+    per_process: bool = False
+
+    @abstractmethod
+    def open_write(self, key: str):
+        """Context manager yielding a binary writer; the object exists once it exits."""
+
+    @abstractmethod
+    def open_read(self, key: str) -> BinaryIO:
+        """Open a stored object for streamed reading."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Delete an object. Missing objects are ignored."""
+
+    @abstractmethod
+    def list(self, prefix: str = "") -> Iterator[tuple[str, int]]:
+        """Yield (key, size) for every stored object whose key starts with prefix."""
+
+    def change_token(self) -> Any:
+        """Cheap value that changes whenever objects are added, or None if unknown.
+
+        Lets the index skip listing the store for IDs it doesn't know when
+        nothing was added since it last listed. Backends without one should
+        answer prefix listings from an index of their own (like S3 does).
+        """
+        return None
+
+    def read_range(self, key: str, start: int, end: int) -> bytes:
+        """Read bytes [start, end) of an object."""
+        with closing(self.open_read(key)) as f:
+            if getattr(f, "seekable", lambda: False)():
+                f.seek(start)
+            else:
+                remaining = start
+                while remaining and (chunk := f.read(min(remaining, 1024 * 1024))):
+                    remaining -= len(chunk)
+            return f.read(end - start)
+
+    def put_file(self, src: str, key: str, move: bool = False) -> None:
+        """Store the file at src under key, streaming it in chunks."""
+        with open(src, "rb") as s, self.open_write(key) as d:
+            shutil.copyfileobj(s, d, 1024 * 1024)
+        if move:
+            os.unlink(src)
+
+    def local_path(self, key: str) -> str | None:
+        """Filesystem path of the object, or None if it doesn't live on local disk."""
+        return None
+
+    def url(self, key: str, filename: str) -> str | None:
+        """Direct download URL that bypasses the app, or None if unsupported."""
+        return None
+
+
+class LocalStorage(Storage):
+    """Files in a local directory. Point it at a tmpfs mount (e.g. /dev/shm/...)
+    to keep small, hot files in RAM.
+
+    Downloads are served with Range/ETag/gzip support and path-based results
+    are reflinked or moved instead of copied.
+    """
+
+    def __init__(self, directory: str | Path):
+        self.directory = Path(directory)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key
+
+    @contextmanager
+    def open_write(self, key: str):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self._path(key), "wb") as f:
+            yield f
+
+    def open_read(self, key: str) -> BinaryIO:
+        return open(self._path(key), "rb")
+
+    def delete(self, key: str) -> None:
+        try:
+            os.unlink(self._path(key))
+        except OSError:
+            pass
+
+    def list(self, prefix: str = "") -> Iterator[tuple[str, int]]:
+        if not self.directory.exists():
+            return
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                # Dot-prefixed names are internal (partial streams, .gzip variants).
+                if entry.name.startswith(".") or not entry.name.startswith(prefix):
+                    continue
+                if entry.is_file():
+                    yield entry.name, entry.stat().st_size
+
+    def change_token(self) -> Any:
+        """Directory mtime; None right after a change, while the mtime clock may
+        not have ticked yet for a file created in the same instant."""
+        try:
+            mtime_ns = os.stat(self.directory).st_mtime_ns
+        except OSError:
+            return None
+        if time.time_ns() - mtime_ns < _MTIME_SETTLE_NS:
+            return None
+        return mtime_ns
+
+    def put_file(self, src: str, key: str, move: bool = False) -> None:
+        """Move, reflink, or kernel-copy src; the data never enters Python memory."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        dst = self._path(key)
+        if move:
+            shutil.move(src, dst)
+        elif not _reflink(src, dst):
+            shutil.copyfile(src, dst)
+
+    def local_path(self, key: str) -> str | None:
+        return str(self._path(key))
+
+
+class MemoryStorage(Storage):
+    """In-process store with a hard size cap, for small hot files.
+
+    Contents are lost on restart and are not shared between processes.
+    Writes that would exceed max_bytes fail with OSError(ENOSPC).
+    """
+
+    per_process = True
+
+    def __init__(self, max_bytes: int | None = None):
+        self.max_bytes = max_bytes
+        self._objects: dict[str, bytes] = {}
+        self._size = 0
+        self._version = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def open_write(self, key: str):
+        buf = io.BytesIO()
+        yield buf
+        data = buf.getvalue()
+
+        with self._lock:
+            old = len(self._objects.get(key, b""))
+            if self.max_bytes is not None and self._size - old + len(data) > self.max_bytes:
+                raise OSError(errno.ENOSPC, "MemoryStorage is full")
+            self._objects[key] = data
+            self._size += len(data) - old
+            self._version += 1
+
+    def open_read(self, key: str) -> BinaryIO:
+        with self._lock:
+            data = self._objects.get(key)
+        if data is None:
+            raise FileNotFoundError(key)
+        return io.BytesIO(data)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            data = self._objects.pop(key, None)
+            if data is not None:
+                self._size -= len(data)
+
+    def list(self, prefix: str = "") -> Iterator[tuple[str, int]]:
+        with self._lock:
+            items = [(k, len(v)) for k, v in self._objects.items() if k.startswith(prefix)]
+        yield from items
+
+    def change_token(self) -> Any:
+        return self._version
+
+
+class S3Storage(Storage):
+    """S3-compatible object store (AWS S3, MinIO, Ceph, R2, ...), shared across nodes.
+
+    Requires boto3. Extra keyword arguments go to `boto3.client("s3", ...)`,
+    e.g. endpoint_url="http://localhost:9000" for a local MinIO or moto server.
+
+    Uploads use boto3's managed multipart transfers; downloads are redirected
+    to short-lived presigned URLs so file bytes never pass through the app.
+
+    Example:
+        run(my_func, returns_dir=S3Storage("reports", prefix="ftw/"))
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        prefix: str = "",
+        client: Any = None,
+        presign_expires: int = 300,
+        **client_kwargs
+    ):
+        if client is None:
+            try:
+                import boto3  # avoid hard dependency at import time
+            except ImportError:
+                raise ImportError("S3Storage requires boto3: pip install boto3")
+            client = boto3.client("s3", **client_kwargs)
+
+        self.bucket = bucket
+        self.prefix = prefix
+        self.client = client
+        self.presign_expires = presign_expires
+
+    @contextmanager
+    def open_write(self, key: str):
+        # Spools to disk past 8 MB, then uploads in parts.
+        with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as buf:
+            yield buf
+            buf.seek(0)
+            self.client.upload_fileobj(buf, self.bucket, self.prefix + key)
+
+    def open_read(self, key: str) -> BinaryIO:
+        return self.client.get_object(Bucket=self.bucket, Key=self.prefix + key)["Body"]
+
+    def delete(self, key: str) -> None:
+        try:
+            self.client.delete_object(Bucket=self.bucket, Key=self.prefix + key)
+        except Exception:
+            pass
+
+    def list(self, prefix: str = "") -> Iterator[tuple[str, int]]:
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix + prefix):
+            for obj in page.get("Contents", []):
+                yield obj["Key"][len(self.prefix):], obj["Size"]
+
+    def read_range(self, key: str, start: int, end: int) -> bytes:
+        if end <= start:
+            return b""
+        obj = self.client.get_object(
+            Bucket=self.bucket, Key=self.prefix + key, Range=f"bytes={start}-{end - 1}"
+        )
+        return obj["Body"].read()
+
+    def put_file(self, src: str, key: str, move: bool = False) -> None:
+        self.client.upload_file(src, self.bucket, self.prefix + key)
+        if move:
+            os.unlink(src)
+
+    def url(self, key: str, filename: str) -> str | None:
+        from urllib.parse import quote
+
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": self.prefix + key,
+                "ResponseContentDisposition": f"attachment; filename*=utf-8''{quote(filename)}",
+            },
+            ExpiresIn=self.presign_expires,
+        )
+
+
+def _reflink(src: str, dst: Path) -> bool:
+    """Copy-on-write clone of src (Linux FICLONE: btrfs, XFS, ...). False if unsupported."""
+    try:
+        import fcntl
+    except ImportError:
+        return False
+
+    ficlone = getattr(fcntl, "FICLONE", 0x40049409)
+    try:
+        with open(src, "rb") as s, open(dst, "wb") as d:
+            fcntl.ioctl(d.fileno(), ficlone, s.fileno())
+        return True
+    except OSError:
+        try:
+            os.unlink(dst)
+        except OSError:
+            pass
+        return False
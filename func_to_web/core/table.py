@@ -1,25 +1,52 @@
+import io
+import sys
+import csv
+import base64
+import itertools
+from array import array
+
+from .return_file_handler import save_returned_stream, STREAM_CHUNK_SIZE
+from .table_store import register_table
+
+# Characters of inline preview kept when a result is spilled to a download,
+# at most max_inline_size.
+PREVIEW_SIZE = 64 * 1024
+
+# Rows stringified per vectorized batch.
+CHUNK_ROWS = 10_000
+
+
+# Libraries are looked up in sys.modules instead of imported: if one hasn't
+# been imported, no result can be an instance of its classes, and a failing
+# import would rescan sys.path on every call.
+
+def _loaded_class(module: str, name: str) -> type | None:
+    mod = sys.modules.get(module)
+    return getattr(mod, name, None) if mod is not None else None
+
+
 def _is_pandas_dataframe(obj) -> bool:
-    try:
-        import pandas as pd
-        return isinstance(obj, pd.DataFrame)
-    except ImportError:
-        return False
+    cls = _loaded_class("pandas", "DataFrame")
+    return cls is not None and isinstance(obj, cls)
 
 
 def _is_numpy_2d_array(obj) -> bool:
-    try:
-        import numpy as np
-        return isinstance(obj, np.ndarray) and obj.ndim == 2
-    except ImportError:
-        return False
+    cls = _loaded_class("numpy", "ndarray")
+    return cls is not None and isinstance(obj, cls) and obj.ndim == 2
 
 
 def _is_polars_dataframe(obj) -> bool:
-    try:
-        import polars as pl
-        return isinstance(obj, pl.DataFrame)
-    except ImportError:
-        return False
+    cls = _loaded_class("polars", "DataFrame")
+    return cls is not None and isinstance(obj, cls)
+
+
+def is_table_type(cls: type) -> bool:
+    """Whether instances of cls may be tables (DataFrames or NumPy arrays)."""
+    for module, name in (("pandas", "DataFrame"), ("polars", "DataFrame"), ("numpy", "ndarray")):
+        table_cls = _loaded_class(module, name)
+        if table_cls is not None and issubclass(cls, table_cls):
+            return True
+    return False
 
 
 def _is_list_of_dicts(data) -> bool:
@@ -32,33 +59,315 @@ def _is_list_of_tuples(data) -> bool:
             and all(isinstance(item, tuple) for item in data))
 
 
-def _make_table(headers: list[str], rows: list[list]) -> dict:
+def _text_size(rows: list[list[str]]) -> int:
+    return sum(map(len, itertools.chain.from_iterable(rows)))
+
+
+def _make_table(headers: list[str], chunks, max_inline_size: int | None = None) -> dict:
+    """Build a table result from chunks of already-stringified rows.
+
+    chunks is consumed lazily. Once the cells exceed max_inline_size
+    characters, the remaining chunks are streamed to a CSV download instead of
+    being kept in memory.
+    """
+    out = []
+    size = 0
+    it = iter(chunks)
+
+    for rows in it:
+        out.extend(rows)
+        size += _text_size(rows)
+        if max_inline_size is not None and size > max_inline_size:
+            return _spill_table(
+                headers, out, itertools.chain.from_iterable(it), min(PREVIEW_SIZE, max_inline_size)
+            )
+
+    return {
+        "type": "table",
+        "headers": headers,
+        "rows": out,
+    }
+
+
+def _spill_table(headers: list[str], head: list[list[str]], rest, preview_size: int) -> dict:
+    """Write the full table to a CSV download and keep a preview inline.
+
+    Byte offsets of every row are recorded while writing, so the table can be
+    paged and sorted server-side (see table_store) without loading it.
+    """
+    offsets = array("Q")
+
+    def csv_chunks():
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        rows = itertools.chain(head, rest)
+
+        writer.writerow(headers)
+        header = buf.getvalue().encode()
+        buf.seek(0)
+        buf.truncate()
+        pos = len(header)
+        pending = [header]
+        pending_size = pos
+
+        while block := list(itertools.islice(rows, CHUNK_ROWS)):
+            # writerow returns the characters written, which are also the
+            # byte lengths when the block is pure ASCII (the common case).
+            lengths = [writer.writerow(cells) for cells in block]
+            text = buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+            data = text.encode()
+            if len(data) != len(text):
+                lengths = [len(line.encode()) for line in _split_lengths(text, lengths)]
+
+            offsets.extend(itertools.accumulate(lengths[:-1], initial=pos))
+            pos += len(data)
+            pending.append(data)
+            pending_size += len(data)
+
+            if pending_size >= STREAM_CHUNK_SIZE:
+                yield b"".join(pending)
+                pending.clear()
+                pending_size = 0
+
+        offsets.append(pos)
+        yield b"".join(pending)
+
+    file_id = save_returned_stream(csv_chunks(), "table.csv")
+    register_table(file_id, headers, offsets)
+
+    # Rows that fit in preview_size characters; the UI fetches the first
+    # page itself when the preview is shorter.
+    preview = []
+    size = 0
+    for cells in head:
+        size += sum(len(c) for c in cells)
+        if size > preview_size:
+            break
+        preview.append(cells)
+
+    return {
+        "type": "table",
+        "headers": headers,
+        "rows": preview,
+        "truncated": True,
+        "paged": True,
+        "total_rows": len(offsets) - 1,
+        "download": {"file_id": file_id, "filename": "table.csv"},
+    }
+
+
+def _split_lengths(text: str, lengths: list[int]):
+    pos = 0
+    for n in lengths:
+        yield text[pos:pos + n]
+        pos += n
+
+
+def _str_chunks(rows):
+    """Stringify arbitrary Python rows, CHUNK_ROWS at a time."""
+    it = iter(rows)
+    while block := list(itertools.islice(it, CHUNK_ROWS)):
+        yield [[str(cell) for cell in row] for row in block]
+
+
+def _columns_to_rows(columns) -> list[tuple[str, ...]]:
+    """Stringify whole columns with map(str, ...) and transpose them into rows.
+
+    One C-level pass per column instead of a Python call per cell.
+    """
+    return list(zip(*[list(map(str, column)) for column in columns]))
+
+
+def _pandas_chunks(df):
+    for start in range(0, len(df), CHUNK_ROWS):
+        chunk = df.iloc[start:start + CHUNK_ROWS]
+        yield _columns_to_rows(chunk.iloc[:, c].tolist() for c in range(chunk.shape[1]))
+
+
+def _polars_chunks(df):
+    for chunk in df.iter_slices(CHUNK_ROWS):
+        yield list(zip(*[_polars_strings(s) for s in chunk.get_columns()]))
+
+
+def _polars_strings(series) -> list[str]:
+    """str() of every value of a polars column.
+
+    Integer and string columns are cast natively, which gives the same text.
+    Other dtypes format differently when cast (true, NaN, 1e-7, datetimes
+    with .000000), so their values go through str() like pandas columns.
+    """
+    import polars as pl  # avoid hard dependency at import time
+
+    dtype = series.dtype
+    if dtype.is_integer() or dtype == pl.Utf8 or dtype == pl.Categorical:
+        return series.cast(pl.Utf8).fill_null("None").to_list()
+    return list(map(str, series.to_list()))
+
+
+def _typed_array(dtype: str, values) -> dict:
+    import numpy as np  # only called with NumPy arrays, so already imported
+
+    data = np.ascontiguousarray(values, dtype=_WIRE_DTYPES[dtype])
+    return {"dtype": dtype, "data": base64.b64encode(data.tobytes()).decode("ascii")}
+
+
+# Wire dtype → little-endian NumPy dtype (matching JS typed arrays).
+_WIRE_DTYPES = {"bool": "u1", "int32": "<i4", "float32": "<f4", "float64": "<f8"}
+
+# Integers beyond this lose precision as JS numbers (float64), so they are sent as strings.
+_MAX_SAFE_INT = 2**53
+
+
+def _str_column(values) -> dict:
+    return {"dtype": "str", "data": list(map(str, values))}
+
+
+def _encode_array(values) -> dict:
+    """Encode one NumPy column as a base64 typed array, or strings if not numeric."""
+    kind = values.dtype.kind
+    if kind == "b":
+        return _typed_array("bool", values)
+    if kind in "iu":
+        if values.size == 0 or (values.min() >= -2**31 and values.max() < 2**31):
+            return _typed_array("int32", values)
+        if values.min() >= -_MAX_SAFE_INT and values.max() <= _MAX_SAFE_INT:
+            return _typed_array("float64", values)
+        return {"dtype": "str", "data": values.astype(str).tolist()}
+    if kind == "f" and values.dtype.itemsize <= 8:
+        return _typed_array("float32" if values.dtype.itemsize <= 4 else "float64", values)
+    if kind in "Mm":
+        # tolist() would turn datetime64[ns] into integers of nanoseconds
+        return {"dtype": "str", "data": values.astype(str).tolist()}
+    return _str_column(values.tolist())
+
+
+def _packed(dtype: str, typecode: str, values: list) -> dict:
+    data = array(typecode, values)
+    if sys.byteorder == "big":
+        data.byteswap()
+    return {"dtype": dtype, "data": base64.b64encode(data.tobytes()).decode("ascii")}
+
+
+def _encode_list(values: list) -> dict:
+    """Encode one column of plain Python values, keeping numbers numeric."""
+    types = set(map(type, values))
+    if types == {bool}:
+        return _packed("bool", "B", values)
+    if types == {int}:
+        low, high = min(values), max(values)
+        if low >= -2**31 and high < 2**31:
+            return _packed("int32", "i", values)
+        if low >= -_MAX_SAFE_INT and high <= _MAX_SAFE_INT:
+            return _packed("float64", "d", values)
+    elif types == {float} or types == {int, float}:
+        if all(-_MAX_SAFE_INT <= v <= _MAX_SAFE_INT for v in values if type(v) is int):
+            return _packed("float64", "d", values)
+    return _str_column(values)
+
+
+def _pandas_column(series) -> dict:
+    if series.dtype.kind in "Mm":
+        # Timestamps and Timedeltas, formatted like the rows format
+        return _str_column(series.tolist())
+    return _encode_array(series.to_numpy())
+
+
+def _polars_column(series) -> dict:
+    if series.dtype.is_temporal():
+        # Formatted like the rows format (see _polars_strings)
+        return _str_column(series.to_list())
+    return _encode_array(series.to_numpy())
+
+
+def _encoded_size(column: dict) -> int:
+    data = column["data"]
+    return len(data) if isinstance(data, str) else _text_size([data])
+
+
+def _make_columns(headers: list[str], length: int, columns, max_inline_size: int | None) -> dict | None:
+    """Build a column-oriented table result; None if it would not fit inline.
+
+    Numeric columns are sent as base64 little-endian typed arrays, everything
+    else as lists of strings.
+    """
+    if max_inline_size is not None and length * len(headers) > max_inline_size:
+        return None
+
+    encoded = []
+    size = 0
+    for column in columns:
+        encoded.append(column)
+        size += _encoded_size(column)
+        if max_inline_size is not None and size > max_inline_size:
+            return None
+
     return {
         "type": "table",
+        "format": "columns",
         "headers": headers,
-        "rows": [[str(cell) for cell in row] for row in rows],
+        "length": length,
+        "columns": encoded,
     }
 
 
-def try_process_table(result) -> dict | None:
+def try_process_columns(result, max_inline_size: int | None = None) -> dict | None:
+    """Like try_process_table, but in the column-oriented wire format.
+
+    Returns None if result is not a table or too large to send inline, in which
+    case the caller falls back to try_process_table (which may spill it).
+    """
+    if _is_pandas_dataframe(result):
+        headers = [str(h) for h in result.columns.tolist()]
+        columns = (_pandas_column(result.iloc[:, i]) for i in range(result.shape[1]))
+        return _make_columns(headers, len(result), columns, max_inline_size)
+
+    if _is_numpy_2d_array(result):
+        headers = [f"Column {i+1}" for i in range(result.shape[1])]
+        columns = (_encode_array(result[:, i]) for i in range(result.shape[1]))
+        return _make_columns(headers, result.shape[0], columns, max_inline_size)
+
+    if _is_polars_dataframe(result):
+        columns = (_polars_column(s) for s in result.get_columns())
+        return _make_columns(result.columns, result.height, columns, max_inline_size)
+
+    if _is_list_of_dicts(result):
+        headers = list(result[0].keys())
+        columns = (_encode_list([item.get(h, "") for item in result]) for h in headers)
+        return _make_columns([str(h) for h in headers], len(result), columns, max_inline_size)
+
+    if _is_list_of_tuples(result):
+        width = len(result[0])
+        headers = [f"Column {i+1}" for i in range(width)]
+        columns = (
+            _encode_list([row[i] if i < len(row) else "" for row in result])
+            for i in range(width)
+        )
+        return _make_columns(headers, len(result), columns, max_inline_size)
+
+    return None
+
+
+def try_process_table(result, max_inline_size: int | None = None) -> dict | None:
     """Detect if result is a table format and convert it. Returns None if not a table."""
     if _is_pandas_dataframe(result):
-        return _make_table(result.columns.tolist(), result.values.tolist())
+        return _make_table(result.columns.tolist(), _pandas_chunks(result), max_inline_size)
 
     if _is_numpy_2d_array(result):
         headers = [f"Column {i+1}" for i in range(result.shape[1])]
-        return _make_table(headers, result.tolist())
+        return _make_table(headers, _str_chunks(row.tolist() for row in result), max_inline_size)
 
     if _is_polars_dataframe(result):
-        return _make_table(result.columns, result.rows())
+        return _make_table(result.columns, _polars_chunks(result), max_inline_size)
 
     if _is_list_of_dicts(result):
         headers = list(result[0].keys())
-        rows = [[item.get(h, "") for h in headers] for item in result]
-        return _make_table(headers, rows)
+        rows = ([item.get(h, "") for h in headers] for item in result)
+        return _make_table(headers, _str_chunks(rows), max_inline_size)
 
     if _is_list_of_tuples(result):
         headers = [f"Column {i+1}" for i in range(len(result[0]))]
-        return _make_table(headers, [list(t) for t in result])
+        return _make_table(headers, _str_chunks(result), max_inline_size)
 
-    return None
\ No newline at end of file
+    return None
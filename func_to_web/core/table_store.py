@@ -0,0 +1,208 @@
+import io
+import csv
+import time
+import threading
+from array import array
+from dataclasses import dataclass, field
+from contextlib import closing
+
+from . import return_file_handler
+from .return_file_handler import get_returned_file
+from .settings import get_settings
+
+
+@dataclass
+class _PagedTable:
+    """Row index over a spilled table.csv in the returned-file store.
+
+    offsets[i] is the byte offset of data row i; offsets[-1] is the end of the
+    file. Sorted views are cached as row permutations, one per column.
+    """
+    headers: list[str]
+    offsets: array
+    expires_at: float
+    sorts: dict[int, array] = field(default_factory=dict)
+
+    @property
+    def total_rows(self) -> int:
+        return len(self.offsets) - 1
+
+
+_tables: dict[str, _PagedTable] = {}
+_lock = threading.Lock()
+
+
+def register_table(file_id: str, headers: list[str], offsets: array) -> None:
+    """Make a spilled CSV pageable through get_rows(). Expires with the file."""
+    now = time.time()
+    table = _PagedTable(
+        headers=headers,
+        offsets=offsets,
+        expires_at=now + get_settings().returns_lifetime,
+    )
+
+    with _lock:
+        for key in [k for k, t in _tables.items() if t.expires_at <= now]:
+            del _tables[key]
+        _tables[file_id] = table
+
+
+@return_file_handler.on_file_removed
+def _forget_table(file_id: str) -> None:
+    with _lock:
+        _tables.pop(file_id, None)
+
+
+def _index_csv(file_id: str, entry: dict) -> _PagedTable:
+    """Rebuild the row index of a table.csv this process didn't write.
+
+    With several workers, the rows request may reach a different process
+    than the one that spilled the table. A newline ends a record only when
+    the number of quotes before it is even (csv doubles embedded quotes).
+    """
+    storage = return_file_handler.get_storage()
+    boundaries = array("Q")
+    pos = 0
+    quotes = 0
+    tail = b""
+
+    with closing(storage.open_read(entry["key"])) as f:
+        while chunk := f.read(return_file_handler.STREAM_CHUNK_SIZE):
+            lines = (tail + chunk).split(b"\n")
+            tail = lines.pop()
+            for line in lines:
+                quotes += line.count(b'"')
+                pos += len(line) + 1
+                if quotes % 2 == 0:
+                    boundaries.append(pos)
+    if tail:
+        boundaries.append(pos + len(tail))
+
+    header = storage.read_range(entry["key"], 0, boundaries[0]) if boundaries else b""
+    headers = _parse(header)[0] if header else []
+
+    table = _PagedTable(
+        headers=headers,
+        offsets=boundaries,
+        expires_at=entry["timestamp"] + get_settings().returns_lifetime,
+    )
+    with _lock:
+        _tables[file_id] = table
+    return table
+
+
+def _get_table(file_id: str) -> tuple[_PagedTable, dict] | None:
+    with _lock:
+        table = _tables.get(file_id)
+        if table is not None and table.expires_at <= time.time():
+            # Expired even if the file is still listed while being deleted.
+            del _tables[file_id]
+            return None
+
+    entry = get_returned_file(file_id)
+    if entry is None:
+        with _lock:
+            _tables.pop(file_id, None)
+        return None
+
+    if table is None:
+        if entry["filename"] != "table.csv":
+            return None
+        table = _index_csv(file_id, entry)
+
+    return table, entry
+
+
+def _parse(data: bytes) -> list[list[str]]:
+    return list(csv.reader(io.StringIO(data.decode("utf-8"), newline="")))
+
+
+def _read_rows_at(entry: dict, table: _PagedTable, indices) -> list[list[str]]:
+    """Read the given data rows by byte offset, in the given order."""
+    storage = return_file_handler.get_storage()
+    rows = []
+
+    with closing(storage.open_read(entry["key"])) as f:
+        seekable = getattr(f, "seekable", lambda: False)()
+        for i in indices:
+            start, end = table.offsets[i], table.offsets[i + 1]
+            if seekable:
+                f.seek(start)
+                data = f.read(end - start)
+            else:
+                data = storage.read_range(entry["key"], start, end)
+            rows.extend(_parse(data))
+
+    return rows
+
+
+def _sort_key(value: str):
+    try:
+        return (0, float(value), "")
+    except ValueError:
+        return (1, 0.0, value)
+
+
+def _sorted_order(entry: dict, table: _PagedTable, column: int) -> array:
+    """Row permutation sorting the table by column; computed once and cached."""
+    order = table.sorts.get(column)
+    if order is not None:
+        return order
+
+    storage = return_file_handler.get_storage()
+    values = []
+    block = 10_000
+    for first in range(0, table.total_rows, block):
+        last = min(first + block, table.total_rows)
+        data = storage.read_range(entry["key"], table.offsets[first], table.offsets[last])
+        values.extend(row[column] if column < len(row) else "" for row in _parse(data))
+
+    order = array("I", sorted(range(len(values)), key=lambda i: _sort_key(values[i])))
+    table.sorts[column] = order
+    return order
+
+
+def get_rows(
+    file_id: str,
+    offset: int = 0,
+    limit: int = 100,
+    sort: int | None = None,
+    descending: bool = False,
+) -> dict | None:
+    """Return one page of a paged table, or None if unknown or expired.
+
+    Blocking (reads the store); call it from a worker thread.
+
+    Returns:
+        {"headers", "rows", "offset", "total_rows"}
+    """
+    found = _get_table(file_id)
+    if found is None:
+        return None
+    table, entry = found
+
+    total = table.total_rows
+    start = max(0, min(offset, total))
+    end = min(start + max(0, limit), total)
+
+    if sort is None:
+        if start == end:
+            rows = []
+        else:
+            storage = return_file_handler.get_storage()
+            data = storage.read_range(entry["key"], table.offsets[start], table.offsets[end])
+            rows = _parse(data)
+    else:
+        order = _sorted_order(entry, table, sort)
+        if descending:
+            indices = [order[total - 1 - i] for i in range(start, end)]
+        else:
+            indices = order[start:end]
+        rows = _read_rows_at(entry, table, indices)
+
+    return {
+        "headers": table.headers,
+        "rows": rows,
+        "offset": start,
+        "total_rows": total,
+    }
@@ -0,0 +1,18 @@
+from .constants import TEMPLATES_DIR
+
+# Shared Jinja environment (templates are static → no auto reload),
+# created on first render so Jinja isn't imported at startup.
+_jinja_env = None
+
+
+def get_template(name: str):
+    """Load a template from TEMPLATES_DIR."""
+    global _jinja_env
+    if _jinja_env is None:
+        from jinja2 import Environment, FileSystemLoader  # deferred: only needed to render pages
+
+        _jinja_env = Environment(
+            loader=FileSystemLoader(TEMPLATES_DIR),
+            auto_reload=False
+        )
+    return _jinja_env.get_template(name)
@@ -1,8 +1,11 @@
 from pathlib import Path
 import base64
+import hashlib
+import os
 import re
 from typing import Any
 
+import pytypeinputweb
 from pytypeinputweb import list_css_variables as _pti_css_variables
 from pytypeinputweb import get_css, get_js
 
@@ -20,12 +23,48 @@ _MIME_TYPES = {
 _CSS_VAR_DEF_RE = re.compile(r"(--functoweb-[\w-]+)\s*:")
 _SLUG_RE = re.compile(r"^[a-z0-9_-]+$")
 
+def _bundle_sources() -> list[Path]:
+    """Every file the CSS/JS bundle is built from."""
+    pti_static = Path(pytypeinputweb.__file__).parent / "static"
+    sources = [*pti_static.glob("*.js"), *(pti_static / "css").glob("*.css")]
+    sources += [*(INTERNAL_STATIC_DIR / "css").glob("*.css"), *(INTERNAL_STATIC_DIR / "js").glob("*.js")]
+    return sorted(sources)
+
+
+def _bundle_key() -> str:
+    """Fingerprint of the bundle sources (paths, sizes and mtimes)."""
+    digest = hashlib.sha256()
+    for path in _bundle_sources():
+        st = path.stat()
+        digest.update(f"{path}\0{st.st_size}\0{st.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    """Write text via a temp file + rename, so concurrent readers never see half a file."""
+    tmp = path.with_name(f".{path.name}.{os.getpid()}")
+    tmp.write_text(text, encoding='utf-8')
+    os.replace(tmp, path)
+
+
 def create_pytypeinput_assets() -> dict[str, Path]:
-    """Create CSS and JS assets."""
-    STATIC_DIR.mkdir(parents=True, exist_ok=True)
+    """Create CSS and JS assets.
 
+    The bundle is only rebuilt when one of its source files changed since it
+    was last written, so restarts and extra workers reuse it as is.
+    """
     css_file = STATIC_DIR / "styles.css"
     js_file = STATIC_DIR / "scripts.js"
+    key_file = STATIC_DIR / ".bundle-key"
+
+    key = _bundle_key()
+    try:
+        if key_file.read_text() == key and css_file.exists() and js_file.exists():
+            return {'css': css_file, 'js': js_file}
+    except OSError:
+        pass
+
+    STATIC_DIR.mkdir(parents=True, exist_ok=True)
 
     pytypeinput_css = get_css()
     pytypeinput_js = get_js()
@@ -45,8 +84,9 @@ def create_pytypeinput_assets() -> dict[str, Path]:
     combined_css = f"{pytypeinput_css}\n\n{functoweb_css}"
     combined_js = f"{pytypeinput_js}\n\n{functoweb_js}"
 
-    css_file.write_text(combined_css, encoding='utf-8')
-    js_file.write_text(combined_js, encoding='utf-8')
+    _write_atomic(css_file, combined_css)
+    _write_atomic(js_file, combined_js)
+    _write_atomic(key_file, key)
 
     return {'css': css_file, 'js': js_file}
 
@@ -126,6 +166,12 @@ def list_css_variables() -> list[str]:
     return sorted(pti_vars + ftw_vars)
 
 
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """True if an If-None-Match header lists etag (weak comparison) or "*"."""
+    tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
 def validate_css_vars(css_vars: dict[str, str] | None) -> None:
     """Validate that CSS variables are valid."""
     if not css_vars:
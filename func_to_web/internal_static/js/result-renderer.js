@@ -5,13 +5,16 @@
     const CLOSE_SVG = `<svg xmlns="http://www.w3.org/2000/svg" width="16" height="16" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"><line x1="18" y1="6" x2="6" y2="18"/><line x1="6" y1="6" x2="18" y2="18"/></svg>`;
     const DOWNLOAD_SVG = `<svg xmlns="http://www.w3.org/2000/svg" width="16" height="16" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"><path d="M21 15v4a2 2 0 0 1-2 2H5a2 2 0 0 1-2-2v-4"/><polyline points="7 10 12 15 17 10"/><line x1="12" y1="15" x2="12" y2="3"/></svg>`;
 
+    // textToCopy / csv may be a function, called on click, for content that
+    // can still grow (streamed table chunks).
     function makeCopyButton(textToCopy) {
         const btn = document.createElement("button");
         btn.className = "functoweb-copy-btn";
         btn.innerHTML = COPY_SVG;
         btn.title = "Copy to clipboard";
         btn.addEventListener("click", () => {
-            navigator.clipboard.writeText(textToCopy).then(() => {
+            const text = typeof textToCopy === "function" ? textToCopy() : textToCopy;
+            navigator.clipboard.writeText(text).then(() => {
                 btn.innerHTML = CHECK_SVG;
                 btn.classList.add("copied");
                 setTimeout(() => {
@@ -42,7 +45,7 @@
         btn.innerHTML = DOWNLOAD_SVG;
         btn.title = "Download as CSV";
         btn.addEventListener("click", () => {
-            const blob = new Blob([csv], { type: "text/csv;charset=utf-8;" });
+            const blob = new Blob([typeof csv === "function" ? csv() : csv], { type: "text/csv;charset=utf-8;" });
             const url = URL.createObjectURL(blob);
             const a = document.createElement("a");
             a.href = url;
@@ -53,6 +56,61 @@
         return btn;
     }
 
+    function makeTruncatedNotice(payload, message) {
+        const notice = document.createElement("div");
+        notice.className = "functoweb-result-truncated";
+
+        const text = document.createElement("span");
+        text.textContent = message;
+        notice.appendChild(text);
+
+        const btn = document.createElement("a");
+        btn.className = "functoweb-download-btn";
+        btn.href = `/download/${payload.download.file_id}`;
+        btn.download = payload.download.filename;
+        btn.innerHTML = `${DOWNLOAD_SVG} ${payload.download.filename}`;
+        notice.appendChild(btn);
+
+        return notice;
+    }
+
+    const TYPED_ARRAYS = { bool: Uint8Array, int32: Int32Array, float32: Float32Array, float64: Float64Array };
+
+    // Shortest decimal that reads back as the same float32, so 0.1f shows
+    // as "0.1" rather than its float64 widening "0.10000000149011612".
+    function float32String(v) {
+        for (let p = 1; p <= 9; p++) {
+            const s = v.toPrecision(p);
+            if (Math.fround(+s) === v) return String(+s);
+        }
+        return String(v);
+    }
+
+    function decodeColumn(column) {
+        if (column.dtype === "str") return column.data;
+        const binary = atob(column.data);
+        const bytes = new Uint8Array(binary.length);
+        for (let i = 0; i < binary.length; i++) bytes[i] = binary.charCodeAt(i);
+        const values = new TYPED_ARRAYS[column.dtype](bytes.buffer);
+        if (column.dtype === "bool") return Array.from(values, (v) => (v ? "True" : "False"));
+        if (column.dtype === "float32") return Array.from(values, float32String);
+        return values;
+    }
+
+    // Column-oriented tables ({format: "columns"}) carry numeric columns as
+    // base64 typed arrays. Columns are decoded one at a time, straight into
+    // typed arrays, and only then turned into display rows.
+    function columnsToRows(payload) {
+        const columns = payload.columns.map(decodeColumn);
+        const rows = new Array(payload.length);
+        for (let r = 0; r < payload.length; r++) {
+            const row = new Array(columns.length);
+            for (let c = 0; c < columns.length; c++) row[c] = String(columns[c][r]);
+            rows[r] = row;
+        }
+        return rows;
+    }
+
     function tableToCsv(headers, rows) {
         const escape = (v) => `"${(v == null ? "" : String(v)).replace(/"/g, '""')}"`;
         const lines = [headers.map(escape).join(",")];
@@ -77,6 +135,14 @@
         table.appendChild(thead);
 
         const tbody = document.createElement("tbody");
+        appendTableRows(tbody, rows);
+        table.appendChild(tbody);
+
+        return table;
+    }
+
+    function appendTableRows(tbody, rows) {
+        const fragment = document.createDocumentFragment();
         for (const row of rows) {
             const tr = document.createElement("tr");
             for (const cell of row) {
@@ -84,11 +150,9 @@
                 td.textContent = cell == null ? "" : cell;
                 tr.appendChild(td);
             }
-            tbody.appendChild(tr);
+            fragment.appendChild(tr);
         }
-        table.appendChild(tbody);
-
-        return table;
+        tbody.appendChild(fragment);
     }
 
     function buildActionTable(headers, rows, action) {
@@ -139,6 +203,133 @@
         return table;
     }
 
+    const PAGE_ROWS = 200;
+    const VIEW_ROWS = 20;
+
+    // Large spilled tables: only the visible rows are in the DOM, pages are
+    // fetched from /results/<id>/rows on demand and sorting happens server-side.
+    function buildPagedTable(payload) {
+        const headers = payload.headers || [];
+        const total = payload.total_rows;
+        const url = `/results/${payload.download.file_id}/rows`;
+        const pages = new Map();
+        let sort = "";
+        let rowHeight = 0;
+
+        const scroller = document.createElement("div");
+        scroller.className = "functoweb-table-wrapper functoweb-table-virtual";
+
+        const table = document.createElement("table");
+        table.className = "functoweb-table";
+
+        const thead = document.createElement("thead");
+        const headRow = document.createElement("tr");
+        headers.forEach((h, i) => {
+            const th = document.createElement("th");
+            th.textContent = h;
+            th.title = "Sort";
+            th.addEventListener("click", () => {
+                sort = sort === String(i) ? `-${i}` : String(i);
+                for (const cell of headRow.children) cell.removeAttribute("data-sort");
+                th.dataset.sort = sort.startsWith("-") ? "desc" : "asc";
+                pages.clear();
+                scroller.scrollTop = 0;
+                render();
+            });
+            headRow.appendChild(th);
+        });
+        thead.appendChild(headRow);
+        table.appendChild(thead);
+
+        const tbody = document.createElement("tbody");
+        table.appendChild(tbody);
+        scroller.appendChild(table);
+
+        // Seed the first page with the inline preview, but only if it holds the
+        // whole page: the preview is capped by size, so wide tables carry fewer
+        // rows and the rest of page 0 must come from the server.
+        const preview = payload.rows || [];
+        if (preview.length >= Math.min(PAGE_ROWS, total)) {
+            pages.set(0, Promise.resolve(preview.slice(0, PAGE_ROWS)));
+        }
+
+        function fetchPage(index) {
+            if (!pages.has(index)) {
+                const key = sort;
+                const params = new URLSearchParams({ offset: index * PAGE_ROWS, limit: PAGE_ROWS, sort });
+                pages.set(index, fetch(`${url}?${params}`)
+                    .then((r) => r.ok ? r.json() : { rows: [] })
+                    .then((data) => data.rows)
+                    .catch(() => {
+                        if (key === sort) pages.delete(index);
+                        return [];
+                    }));
+            }
+            return pages.get(index);
+        }
+
+        function spacer(height) {
+            const tr = document.createElement("tr");
+            tr.className = "functoweb-table-spacer";
+            tr.style.height = `${height}px`;
+            return tr;
+        }
+
+        let renderId = 0;
+        async function render() {
+            const id = ++renderId;
+            const height = rowHeight || 32;
+            const first = Math.max(0, Math.floor(scroller.scrollTop / height) - VIEW_ROWS);
+            const last = Math.min(total, first + VIEW_ROWS * 3);
+
+            const needed = [];
+            for (let p = Math.floor(first / PAGE_ROWS); p * PAGE_ROWS < last; p++) needed.push(p);
+            const loaded = await Promise.all(needed.map(fetchPage));
+            if (id !== renderId) return;
+
+            const rows = [];
+            loaded.forEach((pageRows, k) => {
+                const base = needed[k] * PAGE_ROWS;
+                pageRows.forEach((row, j) => {
+                    const index = base + j;
+                    if (index >= first && index < last) rows.push(row);
+                });
+            });
+
+            const fragment = document.createDocumentFragment();
+            fragment.appendChild(spacer(first * height));
+            for (const row of rows) {
+                const tr = document.createElement("tr");
+                for (const cell of row) {
+                    const td = document.createElement("td");
+                    td.textContent = cell == null ? "" : cell;
+                    tr.appendChild(td);
+                }
+                fragment.appendChild(tr);
+            }
+            fragment.appendChild(spacer(Math.max(0, total - first - rows.length) * height));
+            tbody.replaceChildren(fragment);
+
+            if (!rowHeight && rows.length) {
+                rowHeight = tbody.children[1].getBoundingClientRect().height;
+                if (rowHeight && rowHeight !== height) render();
+            }
+        }
+
+        let ticking = false;
+        scroller.addEventListener("scroll", () => {
+            if (ticking) return;
+            ticking = true;
+            requestAnimationFrame(() => {
+                ticking = false;
+                render();
+            });
+        });
+
+        requestAnimationFrame(render);
+        return scroller;
+    }
+
     const SDT_JS = "https://cdnjs.cloudflare.com/ajax/libs/simple-datatables/10.0.0/simple-datatables.min.js";
     const SDT_CSS = "https://cdnjs.cloudflare.com/ajax/libs/simple-datatables/10.0.0/style.min.css";
 
@@ -186,10 +377,11 @@
         });
     }
 
+    // Resolves to the DataTable, or null if simple-datatables failed to load.
     function enhanceTable(tableEl) {
-        loadSimpleDatatables().then((ok) => {
-            if (!ok || !window.simpleDatatables) return;
-            new window.simpleDatatables.DataTable(tableEl, {
+        return loadSimpleDatatables().then((ok) => {
+            if (!ok || !window.simpleDatatables) return null;
+            return new window.simpleDatatables.DataTable(tableEl, {
                 searchable: true,
                 sortable: true,
                 fixedHeight: true,
@@ -266,16 +458,30 @@
             body.appendChild(pre);
             body.appendChild(makeCopyButton(text));
 
+            if (payload && payload.truncated) {
+                const wrapper = document.createElement("div");
+                wrapper.appendChild(body);
+                wrapper.appendChild(makeTruncatedNotice(
+                    payload,
+                    `Showing the first ${text.length.toLocaleString()} of ${payload.total_size.toLocaleString()} characters.`
+                ));
+                return wrapper;
+            }
+
             return body;
         },
 
         image(payload) {
-            const src = typeof payload === "object" ? payload.data : payload;
+            // Images are served from /download/<id>; "data" holds a data URI
+            // for results built by custom processors.
+            const src = typeof payload === "object" ? (payload.url ?? payload.data) : payload;
+            const fullSrc = (typeof payload === "object" && payload.full_url) || src;
             const body = document.createElement("div");
             body.className = "functoweb-result-body functoweb-result-image";
 
             const img = document.createElement("img");
             img.className = "functoweb-result-img";
+            img.decoding = "async";
             img.src = src;
             body.appendChild(img);
 
@@ -289,7 +495,7 @@
 
                 const fullImg = document.createElement("img");
                 fullImg.className = "functoweb-image-overlay-img";
-                fullImg.src = src;
+                fullImg.src = fullSrc;
                 overlay.appendChild(fullImg);
 
                 overlay.addEventListener("click", () => overlay.remove());
@@ -302,11 +508,29 @@
 
         table(payload) {
             const headers = payload.headers || [];
-            const rows = payload.rows || [];
+            const rows = payload.format === "columns" ? columnsToRows(payload) : (payload.rows || []);
 
             const body = document.createElement("div");
             body.className = "functoweb-result-body functoweb-result-table";
 
+            if (payload.paged) {
+                body.appendChild(buildPagedTable(payload));
+
+                const actions = document.createElement("div");
+                actions.className = "functoweb-table-actions";
+                const count = document.createElement("span");
+                count.className = "functoweb-table-row-count";
+                count.textContent = `${payload.total_rows.toLocaleString()} rows`;
+                actions.appendChild(count);
+                body.appendChild(actions);
+
+                body.appendChild(makeTruncatedNotice(
+                    payload,
+                    "Rows are loaded as you scroll. Download the full table as CSV."
+                ));
+                return body;
+            }
+
             const wrapper = document.createElement("div");
             wrapper.className = "functoweb-table-wrapper";
             const table = buildTable(headers, rows);
@@ -332,13 +556,33 @@
             });
             actions.appendChild(expandBtn);
 
-            const csv = tableToCsv(headers, rows);
+            const csv = () => tableToCsv(headers, rows);
             actions.appendChild(makeDownloadButton(csv, "table.csv"));
             actions.appendChild(makeCopyButton(csv));
 
             body.appendChild(actions);
 
-            enhanceTable(table);
+            if (payload.truncated) {
+                count.textContent = `${rows.length} of ${payload.total_rows.toLocaleString()} rows`;
+                body.appendChild(makeTruncatedNotice(
+                    payload,
+                    "This table is too large to show in full. Download it to see every row."
+                ));
+            }
+
+            // Streamed chunks with the same headers are appended in place.
+            // Rows added before simple-datatables has loaded go straight into
+            // the tbody it will read; afterwards they go through its API.
+            let datatable = null;
+            const tbody = table.tBodies[0];
+            enhanceTable(table).then((dt) => { datatable = dt; });
+
+            body.appendRows = (more) => {
+                for (const row of more) rows.push(row);
+                if (datatable) datatable.insert({ data: more });
+                else appendTableRows(tbody, more);
+                count.textContent = `${rows.length} row${rows.length !== 1 ? "s" : ""}`;
+            };
 
             return body;
         },
@@ -416,6 +660,16 @@
                 body.appendChild(btn);
             }
 
+            if (files.length > 1) {
+                const ids = files.map(f => f.file_id).join(",");
+                const btn = document.createElement("a");
+                btn.className = "functoweb-download-btn";
+                btn.href = `/download/bundle?ids=${ids}`;
+                btn.download = "files.zip";
+                btn.innerHTML = `${DOWNLOAD_SVG} Download all (.zip)`;
+                body.appendChild(btn);
+            }
+
             return body;
         },
     };
@@ -439,6 +693,7 @@
     function clearContainer() {
         const container = getOrCreateContainer();
         container.innerHTML = "";
+        _lastTable = null;
         return container;
     }
 
@@ -469,8 +724,36 @@
         block.appendChild(renderer(payload));
 
         container.appendChild(block);
+        return block;
+    }
+
+    // Last partial table, so consecutive chunks with the same headers are
+    // appended to one table instead of stacking new ones.
+    let _lastTable = null;
+
+    function renderPartial(payload) {
+        const type = payload.type || "text";
+
+        if (type === "table" && !payload.paged) {
+            const rows = payload.format === "columns" ? columnsToRows(payload) : (payload.rows || []);
+            const headers = payload.headers || [];
+            const sameHeaders = _lastTable
+                && _lastTable.headers.length === headers.length
+                && _lastTable.headers.every((h, i) => h === headers[i]);
+
+            if (sameHeaders) {
+                _lastTable.body.appendRows(rows);
+            } else {
+                const block = renderResult(false, "table", { type: "table", headers, rows });
+                _lastTable = { headers, body: block.querySelector(".functoweb-result-table") };
+            }
+            return;
+        }
+
+        _lastTable = null;
+        renderResult(false, type, payload);
     }
 
     window.functoweb = window.functoweb || {};
-    window.functoweb.result = { init, getOrCreateContainer, clearContainer, renderResult };
+    window.functoweb.result = { init, getOrCreateContainer, clearContainer, renderResult, renderPartial };
 })();
\ No newline at end of file
@@ -3,7 +3,7 @@
     if (!form) return;
 
     const action = form.dataset.action;
-    const { getOrCreateContainer, clearContainer, renderResult } = window.functoweb.result;
+    const { getOrCreateContainer, clearContainer, renderResult, renderPartial } = window.functoweb.result;
 
     window.functoweb.result.init(form.parentElement);
 
@@ -97,12 +97,16 @@
                         container.appendChild(consoleUI.el);
                     }
                     consoleUI.append(data);
+                } else if (event === "partial") {
+                    renderPartial(data);
                 } else if (event === "result") {
                     if (data.success) {
-                        renderResult(false, data.type || "text", data);
+                        // Generators end with {type: "end"}; their output came as partials.
+                        if (data.type !== "end") renderResult(false, data.type || "text", data);
                     } else {
                         renderResult(true, "text", data);
                     }
+                    if (data.snapshot) renderSnapshot(container, data.snapshot);
                 }
             }
         }
@@ -110,6 +114,40 @@
         return { process };
     }
 
+    /* ── Materialized results (snapshot age + refresh) ── */
+
+    let lastFormData = null;
+
+    function formatAge(seconds) {
+        if (seconds < 60) return "just now";
+        if (seconds < 3600) return Math.floor(seconds / 60) + " min ago";
+        if (seconds < 86400) return Math.floor(seconds / 3600) + " h ago";
+        return Math.floor(seconds / 86400) + " d ago";
+    }
+
+    function renderSnapshot(container, snapshot) {
+        const note = document.createElement("div");
+        note.className = "functoweb-snapshot";
+
+        const text = document.createElement("span");
+        text.textContent = "Updated " + formatAge(snapshot.age);
+        note.appendChild(text);
+
+        if (lastFormData) {
+            const button = document.createElement("button");
+            button.type = "button";
+            button.className = "functoweb-snapshot-refresh";
+            button.textContent = "Refresh";
+            button.addEventListener("click", () => {
+                button.disabled = true;
+                postForm(lastFormData, "?refresh=1");
+            });
+            note.appendChild(button);
+        }
+
+        container.appendChild(note);
+    }
+
     /* ── SSE stream reader (for fetch responses) ── */
 
     function readSSE(response) {
@@ -221,6 +259,7 @@
 
             const xhr = new XMLHttpRequest();
             xhr.open("POST", action);
+            xhr.setRequestHeader("X-Table-Format", "columns");
             xhr.responseType = "text";
 
             let uploadDone = false;
@@ -259,12 +298,21 @@
 
             xhr.send(formData);
         } else {
-            try {
-                const res = await fetch(action, { method: "POST", body: formData });
-                readSSE(res);
-            } catch (err) {
-                renderResult(true, "text", { data: "Request failed: " + err.message });
-            }
+            lastFormData = formData;
+            await postForm(formData);
         }
     });
+
+    async function postForm(formData, query = "") {
+        try {
+            const res = await fetch(action + query, {
+                method: "POST",
+                body: formData,
+                headers: { "X-Table-Format": "columns" },
+            });
+            readSSE(res);
+        } catch (err) {
+            renderResult(true, "text", { data: "Request failed: " + err.message });
+        }
+    }
 })();
\ No newline at end of file
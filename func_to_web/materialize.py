@@ -0,0 +1,153 @@
+import time
+import asyncio
+import traceback
+
+from .models import FunctionMetadata, NormalizedInput
+from .core.normalization import get_all_functions
+from .core.print_capture import PrintCapture
+from .core.settings import get_settings
+from .call_function import execute_function
+from .process_result import process_error
+from .route_handlers import analyze_function, default_arguments
+
+
+class MaterializedResult:
+    """Latest result of a function called with its default arguments.
+
+    Refreshed every `meta.refresh_interval` seconds by the app's scheduler,
+    on demand, or (when no scheduler runs, e.g. in a mounted app) by the
+    first request after it went stale. Concurrent refreshes share one run.
+
+    Returned files linked from a snapshot expire returns_lifetime seconds
+    after the run that produced them started; from then on the snapshot is
+    not served without a refresh.
+    """
+
+    def __init__(self, meta: FunctionMetadata, app_input: NormalizedInput):
+        self.meta = meta
+        self.app_input = app_input
+        self.interval = meta.refresh_interval
+        self.data: dict | None = None
+        self.refreshed_at: float | None = None
+        self.files_expire_at: float | None = None
+        self._kwargs: dict | None = None
+        self._injected: dict = {}
+        self._task: asyncio.Task | None = None
+
+    def prepare(self) -> None:
+        """Import and analyze the function and build its default arguments.
+
+        Raises ValueError if the function can't be called with defaults only.
+        """
+        params, params_map, injected = analyze_function(self.meta, self.app_input)
+        self._kwargs = default_arguments(self.meta, params, params_map)
+        self._injected = injected
+
+    async def _compute(self) -> None:
+        started = time.time()
+        try:
+            if self._kwargs is None:
+                await asyncio.to_thread(self.prepare)
+            kwargs = dict(self._kwargs)
+            if self._injected:
+                kwargs.update(await self.app_input.resources.resolve(self._injected))
+            data = await execute_function(self.meta, kwargs, PrintCapture())
+        except Exception as exc:
+            traceback.print_exc()
+            data = {"success": False, **process_error(exc)}
+
+        # A failed refresh keeps serving the last good snapshot.
+        if data["success"] or self.data is None or not self.data["success"]:
+            self.data = data
+            self.refreshed_at = time.time()
+            self.files_expire_at = started + get_settings().returns_lifetime
+
+    @property
+    def age(self) -> float | None:
+        """Seconds since the snapshot was taken, None before the first one."""
+        return None if self.refreshed_at is None else time.time() - self.refreshed_at
+
+    def _start_refresh(self) -> asyncio.Task:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._compute())
+        return self._task
+
+    async def refresh(self) -> None:
+        """Run the function now, or wait for the refresh already running."""
+        await asyncio.shield(self._start_refresh())
+
+    @property
+    def period(self) -> float:
+        """Seconds between scheduled refreshes: refresh_interval, capped so
+        that returned files are replaced before they expire."""
+        return min(self.interval, get_settings().returns_lifetime)
+
+    async def latest(self, force: bool = False) -> dict:
+        """Result event data of the snapshot, with its age under "snapshot".
+
+        Waits for a refresh if forced, if there is no snapshot yet or if its
+        returned files may have expired; a stale one is returned immediately
+        while it refreshes in the background.
+        """
+        if force or self.data is None or time.time() >= self.files_expire_at:
+            await self.refresh()
+        elif self.age > self.period:
+            self._start_refresh()
+
+        return {
+            **self.data,
+            "snapshot": {
+                "refreshed_at": self.refreshed_at,
+                "age": round(self.age, 3),
+                "refresh_interval": self.interval,
+            },
+        }
+
+
+class Materializer:
+    """Materialized functions of one app and the scheduler refreshing them.
+
+    Each worker runs its own scheduler between startup and shutdown, so
+    every worker calls each function once per interval and keeps its own
+    snapshot.
+    """
+
+    def __init__(self, app_input: NormalizedInput):
+        functions = (
+            [app_input.single_function] if app_input.single_function
+            else get_all_functions(app_input.items)
+        )
+        self._results = {
+            id(meta): MaterializedResult(meta, app_input)
+            for meta in functions
+            if meta.refresh_interval is not None
+        }
+        self._tasks: list[asyncio.Task] = []
+
+    def get(self, meta: FunctionMetadata) -> MaterializedResult | None:
+        return self._results.get(id(meta))
+
+    async def _refresh_forever(self, result: MaterializedResult) -> None:
+        try:
+            await asyncio.to_thread(result.prepare)
+        except Exception:
+            # Not schedulable (e.g. a parameter without default): report it once.
+            traceback.print_exc()
+            return
+
+        while True:
+            await result.refresh()
+            await asyncio.sleep(result.period)
+
+    async def start(self) -> None:
+        """Take the first snapshots in the background and keep them fresh."""
+        self._tasks = [
+            asyncio.create_task(self._refresh_forever(result))
+            for result in self._results.values()
+        ]
+
+    async def stop(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -2,22 +2,56 @@ from typing import Callable, Any
 from dataclasses import dataclass
 
 from .core.utils import slugify, validate_slug
+from .core.lazy_import import FunctionManifest, split_import_string, import_function
+from .core.resources import ResourceRegistry, normalize_resources
 
 
 @dataclass
 class FunctionMetadata:
     """Metadata for exposing a callable as a web page.
 
+    `function` may also be a "package.module:function" import string: the
+    module is then imported on the first page view or submit, and the
+    description is read from its source (or the app's function manifest)
+    without importing it.
+
+    `resources` maps annotations to Resources (or factories) for this function
+    only, taking precedence over the app's.
+
+    With `refresh_interval` (seconds) the function is materialized: it is run
+    with its default arguments in the background at that interval, and
+    submits of the defaults return the latest result instantly.
+
+    With `cache_max_age` (seconds) a pure, file-less function is also served
+    at GET <url>/result?param=value as JSON with HTTP caching headers, so
+    reverse proxies and CDNs can answer repeated calls.
+
     Missing values are derived in `__post_init__`.
     """
-    function: Callable[..., Any]
+    function: Callable[..., Any] | str
     name: str | None = None
     slug: str | None = None
     description: str | None = None
     hidden: bool = False
+    resources: dict | None = None
+    refresh_interval: float | None = None
+    cache_max_age: int | None = None
 
     def __post_init__(self):
-        if not callable(self.function):
+        self.import_string: str | None = None
+        self.resources = normalize_resources(self.resources)
+
+        if self.refresh_interval is not None and not self.refresh_interval > 0:
+            raise ValueError(f"refresh_interval must be positive, got {self.refresh_interval}")
+        if self.cache_max_age is not None and (
+            not isinstance(self.cache_max_age, int) or self.cache_max_age < 0
+        ):
+            raise ValueError(f"cache_max_age must be a non-negative int, got {self.cache_max_age!r}")
+
+        if isinstance(self.function, str):
+            split_import_string(self.function)
+            self.import_string = self.function
+        elif not callable(self.function):
             raise TypeError(
                 f"function must be callable, got {type(self.function).__name__}"
             )
@@ -26,7 +60,10 @@ class FunctionMetadata:
             self.name = None
 
         if self.name is None:
-            func_name = getattr(self.function, "__name__", None)
+            if self.import_string is not None:
+                func_name = self.import_string.rpartition(".")[2].rpartition(":")[2]
+            else:
+                func_name = getattr(self.function, "__name__", None)
             if func_name is None:
                 func_name = type(self.function).__name__
             self.name = func_name.replace("_", " ").capitalize()
@@ -36,13 +73,25 @@ class FunctionMetadata:
 
         validate_slug(self.slug)
 
-        if self.description is None:
+        # Lazy functions are described by normalize_input, from the manifest.
+        if self.description is None and self.import_string is None:
             self.description = (
                 self.function.__doc__.strip()
                 if self.function.__doc__
                 else ""
             )
 
+    @property
+    def loaded(self) -> bool:
+        """False until the function of an import string has been imported."""
+        return not isinstance(self.function, str)
+
+    def load(self) -> Callable[..., Any]:
+        """Return the function, importing it first if given as an import string."""
+        if isinstance(self.function, str):
+            self.function = import_function(self.function)
+        return self.function
+
 @dataclass
 class HiddenFunction(FunctionMetadata):
     hidden: bool = True
@@ -60,6 +109,9 @@ class NormalizedInput:
     css_vars: dict[str, str] | None
     favicon_data_uri: str | None
     navigation_data: list[dict] | None = None
+    manifest: FunctionManifest | None = None
+    resources: ResourceRegistry | None = None
+    materializer: Any = None    # Materializer, set by create_app()
 
     def __post_init__(self):
         from .core.normalization import build_navigation_structure
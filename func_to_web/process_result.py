@@ -1,8 +1,10 @@
-import io
-import base64
+import sys
+from typing import Any, Callable
 from .types import FileResponse, ActionTable
-from .core.return_file_handler import save_returned_file
-from .core.table import try_process_table
+from .core.return_file_handler import save_returned_file, save_returned_stream, write_stream
+from .core.table import try_process_table, try_process_columns, is_table_type, PREVIEW_SIZE
+from .core.image import store_pil_image, store_figure
+from .core.settings import get_settings
 from .core.utils import slugify
 
 
@@ -12,30 +14,35 @@ def process_error(exc: Exception) -> dict:
 
 
 def process_str(s: str) -> dict:
-    """Return a text result."""
+    """Return a text result, spilled to a .txt download if over max_inline_size."""
+    max_inline_size = get_settings().max_inline_size
+    if max_inline_size is not None and len(s) > max_inline_size:
+        return _spill_str(s, min(PREVIEW_SIZE, max_inline_size))
     return {"type": "text", "data": s}
 
 
+def _spill_str(s: str, preview_size: int) -> dict:
+    """Save a long string as result.txt and keep its first preview_size characters inline."""
+    step = 1024 * 1024
+    chunks = (s[i:i + step].encode() for i in range(0, len(s), step))
+    file_id = save_returned_stream(chunks, "result.txt")
+    return {
+        "type": "text",
+        "data": s[:preview_size],
+        "truncated": True,
+        "total_size": len(s),
+        "download": {"file_id": file_id, "filename": "result.txt"},
+    }
+
+
 def process_pil_image(image) -> dict:
-    """Convert a PIL Image to a base64 PNG data URI."""
-    buf = io.BytesIO()
-    image.save(buf, format="PNG")
-    image.close()
-    buf.seek(0)
-    b64 = base64.b64encode(buf.read()).decode()
-    return {"type": "image", "data": f"data:image/png;base64,{b64}"}
+    """Store a PIL Image as a returned file and reference it by URL."""
+    return store_pil_image(image)
 
 
 def process_matplotlib_figure(figure) -> dict:
-    """Convert a matplotlib Figure to a base64 PNG data URI."""
-    import matplotlib.pyplot as plt  # avoid hard dependency at import time
-
-    buf = io.BytesIO()
-    figure.savefig(buf, format="png", bbox_inches="tight")
-    buf.seek(0)
-    b64 = base64.b64encode(buf.read()).decode()
-    plt.close(figure)
-    return {"type": "image", "data": f"data:image/png;base64,{b64}"}
+    """Store a matplotlib Figure as a returned file and reference it by URL."""
+    return store_figure(figure)
 
 
 def process_file_response(file_response: FileResponse) -> dict:
@@ -48,6 +55,21 @@ def process_file_response(file_response: FileResponse) -> dict:
     }
 
 
+async def stage_file_streams(result) -> None:
+    """Write streaming FileResponses to disk before process_result() runs.
+
+    Async iterators can only be consumed on the event loop, so this runs first;
+    each stream becomes a path-based response that is then moved into place.
+    """
+    if isinstance(result, (tuple, list)):
+        for item in result:
+            await stage_file_streams(item)
+    elif isinstance(result, FileResponse) and result.stream is not None:
+        result.path = await write_stream(result.stream)
+        result.stream = None
+        result.move = True
+
+
 def process_file_response_list(items: list[FileResponse]) -> dict:
     """Save multiple FileResponse objects and return a batch download descriptor."""
     files = []
@@ -68,89 +90,143 @@ def process_action_table(t: ActionTable) -> dict:
     }
 
 
-def _is_pil_image(obj) -> bool:
-    """Check if object is a PIL Image (safe if PIL not installed)."""
-    try:
-        from PIL import Image
-        return isinstance(obj, Image.Image)
-    except ImportError:
-        return False
+def _process_table(result, columnar: bool) -> dict | None:
+    """Table result in the client's preferred format; None if not table-like."""
+    max_inline_size = get_settings().max_inline_size
+    if columnar:
+        table = try_process_columns(result, max_inline_size)
+        if table is not None:
+            return table
+    return try_process_table(result, max_inline_size)
 
 
-def _is_matplotlib_figure(obj) -> bool:
-    """Check if object is a matplotlib Figure (safe if matplotlib not installed)."""
-    try:
-        from matplotlib.figure import Figure
-        return isinstance(obj, Figure)
-    except ImportError:
-        return False
+def _process_none(result, columnar: bool) -> dict:
+    return process_str("Done")
 
 
-def _process_single(result) -> dict:
-    """Serialize a single return value.
+def _process_text(result, columnar: bool) -> dict:
+    return process_str(result)
 
-    Order matters:
-    - None → "Done"
-    - list/tuple → recursive
-    - str → text
-    - ActionTable → action_table
-    - FileResponse → download
-    - PIL → image
-    - matplotlib → image
-    - table-like → table
-    - fallback → str()
-    """
-    if result is None:
-        return process_str("Done")
 
-    if isinstance(result, (tuple, list)):
-        return process_result(result)
+def _process_other(result, columnar: bool) -> dict:
+    return process_str(str(result))
 
-    if isinstance(result, str):
-        return process_str(result)
 
-    if isinstance(result, ActionTable):
-        return process_action_table(result)
+def _process_table_or_str(result, columnar: bool) -> dict:
+    table = _process_table(result, columnar)
+    if table is not None:
+        return table
+    return process_str(str(result))
 
-    if isinstance(result, FileResponse):
-        return process_file_response(result)
 
-    if _is_pil_image(result):
-        return process_pil_image(result)
+def _process_sequence(result, columnar: bool) -> dict:
+    if len(result) == 0:
+        return process_str("Done")
 
-    if _is_matplotlib_figure(result):
-        return process_matplotlib_figure(result)
+    if all(isinstance(item, FileResponse) for item in result):
+        return process_file_response_list(list(result))
 
-    # Try structured table formats (list[dict], dataclasses, etc.)
-    table = try_process_table(result)
+    # list[dict] and list[tuple] tables
+    table = _process_table(result, columnar)
     if table is not None:
         return table
 
-    return process_str(str(result))
+    items = [process_result(item, columnar) for item in result if item is not None]
 
+    if len(items) == 1:
+        return items[0]
 
-def process_result(result) -> dict:
-    """Top-level dispatcher for function return values.
+    if len(items) > 1:
+        return {"type": "multiple", "data": items}
+
+    return process_str("Done")
+
+
+# User processors registered with register_result_processor(), by class.
+_processors: dict[type, Callable[[Any], dict]] = {}
+
+# Resolved handler per result class. Filled lazily by _resolve().
+_dispatch_cache: dict[type, Callable[[Any, bool], dict]] = {}
 
-    Handles sequences first, then falls back to single-value processing.
+
+def register_result_processor(cls: type, processor: Callable[[Any], dict] | None = None):
+    """Serialize instances of cls (and its subclasses) with processor(result).
+
+    processor returns a result dict the UI understands, e.g.
+    {"type": "text", "data": "..."} or {"type": "table", "headers": [...], "rows": [...]}.
+    Registered processors take precedence over the built-in ones.
+
+    Can be used as a decorator:
+
+        @register_result_processor(Invoice)
+        def invoice_result(invoice):
+            return {"type": "text", "data": invoice.render()}
     """
-    if isinstance(result, (tuple, list)):
-        if len(result) == 0:
-            return process_str("Done")
+    if processor is None:
+        return lambda func: register_result_processor(cls, func)
 
-        if all(isinstance(item, FileResponse) for item in result):
-            return process_file_response_list(list(result))
+    _processors[cls] = processor
+    _dispatch_cache.clear()
+    return processor
 
-        table = try_process_table(result)
-        if table is not None:
-            return table
 
-        items = [_process_single(item) for item in result if item is not None]
+def _is_loaded_subclass(cls: type, module: str, name: str) -> bool:
+    """issubclass(cls, module.name), without importing module."""
+    mod = sys.modules.get(module)
+    base = getattr(mod, name, None) if mod is not None else None
+    return base is not None and issubclass(cls, base)
 
-        if len(items) == 1:
-            return items[0]
 
-        if len(items) > 1:
-            return {"type": "multiple", "data": items}
+def _find_handler(cls: type) -> Callable[[Any, bool], dict]:
+    """Pick the handler for a result class.
 
-    return _process_single(result)
\ No newline at end of file
+    Order matters:
+    - registered processors
+    - None → "Done"
+    - list/tuple → table or recursive
+    - str → text
+    - ActionTable → action_table
+    - FileResponse → download
+    - PIL → image
+    - matplotlib → image
+    - DataFrame / ndarray → table
+    - fallback → str()
+    """
+    for klass in cls.__mro__:
+        processor = _processors.get(klass)
+        if processor is not None:
+            return lambda result, columnar: processor(result)
+
+    if cls is type(None):
+        return _process_none
+    if issubclass(cls, (tuple, list)):
+        return _process_sequence
+    if issubclass(cls, str):
+        return _process_text
+    if issubclass(cls, ActionTable):
+        return lambda result, columnar: process_action_table(result)
+    if issubclass(cls, FileResponse):
+        return lambda result, columnar: process_file_response(result)
+    if _is_loaded_subclass(cls, "PIL.Image", "Image"):
+        return lambda result, columnar: process_pil_image(result)
+    if _is_loaded_subclass(cls, "matplotlib.figure", "Figure"):
+        return lambda result, columnar: process_matplotlib_figure(result)
+    if is_table_type(cls):
+        return _process_table_or_str
+    return _process_other
+
+
+def _resolve(cls: type) -> Callable[[Any, bool], dict]:
+    handler = _dispatch_cache.get(cls)
+    if handler is None:
+        handler = _dispatch_cache[cls] = _find_handler(cls)
+    return handler
+
+
+def process_result(result, columnar: bool = False) -> dict:
+    """Top-level dispatcher for function return values.
+
+    The handler is resolved once per result class and cached, so dispatch is a
+    dict lookup. columnar=True sends inline tables in the column-oriented format.
+    """
+    return _resolve(type(result))(result, columnar)
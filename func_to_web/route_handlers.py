@@ -1,19 +1,24 @@
 import json
+import hashlib
 import inspect
-from typing import get_type_hints
+from typing import Any, get_type_hints
 
 from fastapi import Request
 from starlette.datastructures import UploadFile
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from pytypeinput import ParamMetadata
 from pytypeinput.analyzer import analyze_type
 from pytypeinput.validate import validate_value
 
 from .builder import render_page
 from .models import FunctionMetadata, NormalizedInput
+from .core.resources import Resource
 from .types import Params
-from .core.save_file_handler import save_uploaded_file, cleanup_uploaded_file
-from .call_function import call_function
+from .core.save_file_handler import save_uploaded_files, cleanup_uploaded_file
+from .core.print_capture import PrintCapture
+from .core.settings import get_settings
+from .core.utils import etag_matches
+from .call_function import PartialQueue, call_function, execute_function, result_response
 
 
 def _reconstruct(params_class, model_data: dict):
@@ -24,19 +29,37 @@ def _reconstruct(params_class, model_data: dict):
     return obj
 
 
-def _analyze(func) -> tuple[list[ParamMetadata], dict]:
+# (func, excluded names) → (params, params_map); signatures don't change while the process runs.
+_analysis_cache: dict[Any, tuple[list[ParamMetadata], dict]] = {}
+
+
+def _analyze(func, exclude: frozenset[str] = frozenset()) -> tuple[list[ParamMetadata], dict]:
     """Analyze a function's parameters, expanding Params subclasses into individual fields.
 
-    Returns the flat param list and a map of
-    {original_param_name: (ParamsClass, [field_names])}.
+    Parameters named in exclude (injected resources) are skipped. Returns the
+    flat param list and a map of {original_param_name: (ParamsClass, [field_names])}.
+    Results are cached per function; the returned list is a copy the caller
+    may modify.
     """
+    try:
+        cached = _analysis_cache.get((func, exclude))
+    except TypeError:  # unhashable callable instance
+        return _analyze_uncached(func, exclude)
+
+    if cached is None:
+        cached = _analysis_cache[(func, exclude)] = _analyze_uncached(func, exclude)
+    params, params_map = cached
+    return list(params), params_map
+
+
+def _analyze_uncached(func, exclude: frozenset[str] = frozenset()) -> tuple[list[ParamMetadata], dict]:
     hints = get_type_hints(func, include_extras=True)
     sig = inspect.signature(func)
     params = []
     params_map = {}
 
     for p in sig.parameters.values():
-        if p.name not in hints:
+        if p.name not in hints or p.name in exclude:
             continue
         annotation = hints[p.name]
         if isinstance(annotation, type) and issubclass(annotation, Params):
@@ -55,6 +78,72 @@ def _analyze(func) -> tuple[list[ParamMetadata], dict]:
     return params, params_map
 
 
+def injected_resources(meta: FunctionMetadata, app_input: NormalizedInput) -> dict[str, Resource]:
+    """Parameters of a loaded function filled by the app's (or its own) resources."""
+    if app_input.resources is None:
+        return {}
+    return app_input.resources.injected(meta.function, meta.resources)
+
+
+def analyze_function(
+    meta: FunctionMetadata,
+    app_input: NormalizedInput
+) -> tuple[list[ParamMetadata], dict, dict[str, Resource]]:
+    """Load and analyze a function: (form params, params_map, injected resources).
+
+    Records the params of import-string functions in the app's manifest.
+    """
+    lazy = not meta.loaded
+    meta.load()
+    injected = injected_resources(meta, app_input)
+    params, params_map = _analyze(meta.function, frozenset(injected))
+    if lazy and app_input.manifest is not None:
+        app_input.manifest.record_params(meta.import_string, serialize_params(params))
+    return params, params_map, injected
+
+
+def default_values(params: list[ParamMetadata]) -> dict:
+    """Flat {name: default} of the form params, as validate_submit would return them."""
+    return {p.name: p.default for p in params}
+
+
+def default_arguments(
+    meta: FunctionMetadata,
+    params: list[ParamMetadata],
+    params_map: dict
+) -> dict:
+    """Keyword arguments calling a function with its defaults (Params rebuilt).
+
+    Raises ValueError if a parameter has no default and isn't optional.
+    """
+    missing = [p.name for p in params if p.default is None and p.optional is None]
+    if missing:
+        raise ValueError(
+            f"Function '{meta.name}' needs a default for {', '.join(missing)} to be materialized"
+        )
+
+    kwargs = default_values(params)
+    for param_name, (params_class, field_names) in params_map.items():
+        kwargs[param_name] = _reconstruct(
+            params_class, {f: kwargs.pop(f) for f in field_names}
+        )
+    return kwargs
+
+
+def serialize_params(params: list[ParamMetadata]) -> list[dict]:
+    """JSON form of analyzed params, as listed by /doc and cached in the manifest.
+
+    Choices computed by a function are flagged with "dynamic": true.
+    """
+    serialized = []
+    for p in params:
+        d = p.to_dict()
+        if p.choices is not None and p.choices.options_function is not None:
+            d.setdefault("choices", {})["dynamic"] = True
+        serialized.append(d)
+    return serialized
+
+
 def validate_submit(
     params: list[ParamMetadata],
     values: dict,
@@ -90,14 +179,66 @@ def validate_submit(
     return validated, errors
 
 
+def query_values(params: list[ParamMetadata], query) -> dict:
+    """Form values from query parameters.
+
+    List params take repeated keys (?tag=a&tag=b) or one JSON array, as in
+    URL prefill; for other params the last value wins.
+    """
+    lists = {p.name for p in params if p.list is not None}
+    values = {}
+    for key in query.keys():
+        items = query.getlist(key)
+        if key not in lists:
+            values[key] = items[-1]
+            continue
+        if len(items) == 1 and items[0].startswith("["):
+            try:
+                values[key] = json.loads(items[0])
+                continue
+            except ValueError:
+                pass
+        values[key] = items
+    return values
+
+
+def rebuild_params(validated: dict, params_map: dict) -> dict:
+    """Reconstruct Params instances from flat validated values (in place).
+
+    Returns {param_name: error} for the ones that couldn't be built.
+    """
+    errors = {}
+    for param_name, (params_class, field_names) in params_map.items():
+        model_data = {f: validated.pop(f) for f in field_names if f in validated}
+        try:
+            validated[param_name] = _reconstruct(params_class, model_data)
+        except (ValueError, TypeError) as e:
+            errors[param_name] = str(e)
+    return errors
+
+
 def create_handlers(
     meta: FunctionMetadata,
     app_input: NormalizedInput,
     base_url: str
 ) -> tuple:
-    """Create the page and submit handlers for a function."""
+    """Create the page and submit handlers for a function.
+
+    Imports the function first if it was given as an import string.
+    Parameters annotated with a registered resource type are not part of the
+    form; they are filled with the worker's instance on every call. Submits of
+    a materialized function with its default values return its latest snapshot
+    (POST .../submit?refresh=1 to refresh it first).
+
+    Returns (page_handler, submit_handler, result_handler); the last one
+    serves GET .../result for functions with cache_max_age.
+    """
     # Analyze once; Params subclasses are expanded into individual fields.
-    params, params_map = _analyze(meta.function)
+    params, params_map, injected = analyze_function(meta, app_input)
+
+    materialized = app_input.materializer.get(meta) if app_input.materializer else None
+    file_params = [p.name for p in params if p.special_widget == "File"]
+    defaults = default_values(params) if materialized is not None else None
 
     def refresh_params():
         """Refresh dynamic parameter choices."""
@@ -150,6 +291,11 @@ def create_handlers(
                     "errors": errors,
                 }, status_code=422)
 
+            # Submits of the default values are answered from the latest snapshot.
+            if materialized is not None and not uploaded_files and validated == defaults:
+                force = request.query_params.get("refresh", "").lower() in ("1", "true", "yes")
+                return result_response(await materialized.latest(force))
+
             # Validate filenames/extensions before saving anything.
             for name, file_list in uploaded_files.items():
                 param = params_by_name[name]
@@ -167,37 +313,34 @@ def create_handlers(
                     "errors": errors,
                 }, status_code=422)
 
-            for name, file_list in uploaded_files.items():
-                paths = []
-                try:
-                    for upload_file in file_list:
-                        path = await save_uploaded_file(upload_file)
-                        saved_paths.append(path)
-                        paths.append(path)
-                except ValueError as e:
-                    for p in saved_paths:
-                        cleanup_uploaded_file(p, force=True)
-                    return JSONResponse({
-                        "success": False,
-                        "errors": {name: str(e)},
-                    }, status_code=422)
+            # Files of all params are written concurrently; a failure removes them all.
+            saved, errors = await save_uploaded_files(uploaded_files)
+
+            if errors:
+                return JSONResponse({
+                    "success": False,
+                    "errors": errors,
+                }, status_code=422)
 
+            for name, paths in saved.items():
+                saved_paths.extend(paths)
                 validated[name] = (
                     paths if params_by_name[name].list is not None else paths[0]
                 )
 
             # Reconstruct Params instances from flat validated values.
-            for param_name, (params_class, field_names) in params_map.items():
-                model_data = {f: validated.pop(f) for f in field_names if f in validated}
-                try:
-                    validated[param_name] = _reconstruct(params_class, model_data)
-                except (ValueError, TypeError) as e:
-                    return JSONResponse({
-                        "success": False,
-                        "errors": {param_name: str(e)},
-                    }, status_code=422)
+            errors = rebuild_params(validated, params_map)
+            if errors:
+                return JSONResponse({
+                    "success": False,
+                    "errors": errors,
+                }, status_code=422)
+
+            if injected:
+                validated.update(await app_input.resources.resolve(injected))
 
-            return await call_function(meta, validated, saved_paths)
+            columnar = request.headers.get("x-table-format") == "columns"
+            return await call_function(meta, validated, saved_paths, columnar)
 
         except Exception as e:
             for p in saved_paths:
@@ -207,4 +350,64 @@ def create_handlers(
                 "error": str(e),
             }, status_code=400)
 
-    return page_handler, submit_handler
\ No newline at end of file
+    async def result_handler(request: Request):
+        """Run a cacheable function from query parameters; JSON with caching headers.
+
+        The ETag hashes the response body, so revalidation still runs the
+        function but skips the transfer. Behind a login the response is
+        private to the browser; shared caches only store it for public apps.
+        """
+        no_store = {"Cache-Control": "no-store"}
+
+        if file_params:
+            return JSONResponse({
+                "success": False,
+                "error": "Functions with file parameters can't be called with GET",
+            }, status_code=400, headers=no_store)
+
+        values = query_values(params, request.query_params)
+        validated, errors = validate_submit(params, values, file_keys=set())
+        # Omitted params take their defaults, unlike form submits which send every field.
+        for param in params:
+            if param.name not in values and param.default is not None:
+                validated[param.name] = param.default
+                errors.pop(param.name, None)
+        if not errors:
+            errors = rebuild_params(validated, params_map)
+        if errors:
+            return JSONResponse({
+                "success": False,
+                "errors": errors,
+            }, status_code=422, headers=no_store)
+
+        if injected:
+            validated.update(await app_input.resources.resolve(injected))
+
+        columnar = request.headers.get("x-table-format") == "columns"
+        partials = PartialQueue(0)
+        data = await execute_function(meta, validated, PrintCapture(), columnar, partials)
+        if items := partials.drain():
+            data["partials"] = items
+        body = json.dumps(data).encode()
+
+        if not data["success"]:
+            return Response(body, status_code=400, media_type="application/json", headers=no_store)
+
+        max_age = meta.cache_max_age
+        if b'"file_id"' in body:
+            # Don't let caches outlive the returned files the result links to.
+            max_age = min(max_age, get_settings().returns_lifetime)
+
+        private = "session" in request.scope
+        headers = {
+            "Cache-Control": f"{'private' if private else 'public'}, max-age={max_age}",
+            "ETag": f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+            "Vary": "X-Table-Format, Cookie, Authorization" if private else "X-Table-Format",
+        }
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and etag_matches(if_none_match, headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+        return Response(body, media_type="application/json", headers=headers)
+
+    return page_handler, submit_handler, result_handler
\ No newline at end of file
@@ -1,49 +1,139 @@
 import re
+import time
+import asyncio
+from urllib.parse import quote
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.responses import HTMLResponse, FileResponse as FastAPIFileResponse, JSONResponse
-from fastapi.responses import PlainTextResponse
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse, RedirectResponse
+from starlette.datastructures import URLPath
+from starlette.routing import BaseRoute, Match, NoMatchFound
 
 from .builder import render_index
 from .models import FunctionMetadata, NormalizedInput
 from .core.docs import build_doc
-from .core.normalization import get_all_functions
-from .core.return_file_handler import get_returned_file
+from .core.table_store import get_rows
+from .core import return_file_handler
+from .core.settings import get_settings
+from .core.utils import etag_matches
+from .core.return_file_handler import (
+    get_returned_file, get_gzip_variant, iter_zip_bundle, iter_returned_file
+)
 from .route_handlers import create_handlers
 
 
 UUID_PATTERN = re.compile(r"^[a-f0-9]{32}$")
+MAX_BUNDLE_FILES = 1000
+MAX_PAGE_ROWS = 1000
 
 
-def register_function_routes(
-    app: FastAPI,
-    meta: FunctionMetadata,
-    app_input: NormalizedInput,
-    url: str
-) -> None:
-    """Register routes for a single function."""
-    page_handler, submit_handler = create_handlers(meta, app_input, base_url=url)
+class _FunctionEntry:
+    """A function of the catalog; its handlers are created on first request."""
+
+    __slots__ = ("meta", "url", "handlers")
+
+    def __init__(self, meta: FunctionMetadata, url: str):
+        self.meta = meta
+        self.url = url
+        self.handlers: tuple | None = None
+
+
+class FunctionDispatchRoute(BaseRoute):
+    """One route serving every function page (GET), submit (POST) and, for
+    cacheable functions, result (GET).
+
+    Paths are resolved with a dict lookup instead of being matched against
+    routes per function, and each function is analyzed (create_handlers)
+    the first time it is requested rather than at startup. Functions given as
+    import strings are imported at that point too.
+
+    For url_path_for, a function page is named by its URL without the leading
+    slash ("add", "math/add"); its other routes add ":submit" or ":result".
+    """
+
+    _ALLOWED = {"page": ("GET", "HEAD"), "submit": ("POST",), "result": ("GET", "HEAD")}
+
+    def __init__(self, entries: dict[str, _FunctionEntry], app_input: NormalizedInput):
+        self.entries = entries
+        self.app_input = app_input
+
+    def _lookup(self, scope) -> tuple[_FunctionEntry, str] | None:
+        """(entry, "page" | "submit" | "result") for the request path, or None."""
+        path = scope["path"]
+        root_path = scope.get("root_path", "")
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+
+        entry = self.entries.get(path)
+        if entry is not None:
+            return entry, "page"
+        base, _, action = path.rpartition("/")
+        entry = self.entries.get(base)
+        if entry is None:
+            return None
+        if action == "submit":
+            return entry, "submit"
+        if action == "result" and entry.meta.cache_max_age is not None:
+            return entry, "result"
+        return None
 
-    app.get(url, response_class=HTMLResponse)(page_handler)
-    app.post(f"{url}/submit")(submit_handler)
+    def url_path_for(self, name: str, /, **path_params) -> URLPath:
+        url, _, action = name.partition(":")
+        entry = self.entries.get(f"/{url}")
+        if entry is not None and not path_params:
+            if action == "":
+                return URLPath(path=entry.url, protocol="http")
+            if action == "submit" or (action == "result" and entry.meta.cache_max_age is not None):
+                return URLPath(path=f"{entry.url}/{action}", protocol="http")
+        raise NoMatchFound(name, path_params)
 
+    def matches(self, scope) -> tuple[Match, dict]:
+        if scope["type"] != "http":
+            return Match.NONE, {}
+        found = self._lookup(scope)
+        if found is None:
+            return Match.NONE, {}
 
-def register_navigation_routes(
-    app: FastAPI,
+        match = Match.FULL if scope["method"] in self._ALLOWED[found[1]] else Match.PARTIAL
+        return match, {"endpoint": self.handle, "path_params": {}}
+
+    async def handle(self, scope, receive, send) -> None:
+        entry, kind = self._lookup(scope)
+        allowed = self._ALLOWED[kind]
+        if scope["method"] not in allowed:
+            response = PlainTextResponse(
+                "Method Not Allowed", status_code=405, headers={"Allow": ", ".join(allowed)}
+            )
+            await response(scope, receive, send)
+            return
+
+        if entry.handlers is None:
+            # May import the function's module: keep it off the event loop.
+            entry.handlers = await asyncio.to_thread(
+                create_handlers, entry.meta, self.app_input, entry.url
+            )
+        page_handler, submit_handler, result_handler = entry.handlers
+
+        if kind == "submit":
+            response = await submit_handler(Request(scope, receive))
+        elif kind == "result":
+            response = await result_handler(Request(scope, receive))
+        else:
+            response = HTMLResponse(await page_handler())
+        await response(scope, receive, send)
+
+
+def _collect_functions(
+    items: list,
     nav_items: list,
-    app_input: NormalizedInput
+    entries: dict[str, _FunctionEntry]
 ) -> None:
-    """Recursively register routes for all navigation items."""
-    # Resolve all functions once, then match them by slug.
-    all_functions = get_all_functions(app_input.items)
-
-    for item in nav_items:
+    """Pair each function with its navigation entry (same tree shape), in one pass."""
+    for item, nav in zip(items, nav_items):
         if item["type"] == "function":
-            meta = next((m for m in all_functions if m.slug == item["slug"]), None)
-            if meta:
-                register_function_routes(app, meta, app_input, item["url"])
+            entries[nav["url"]] = _FunctionEntry(item["data"], nav["url"])
         else:
-            register_navigation_routes(app, item["children"], app_input)
+            _collect_functions(item["data"], nav["children"], entries)
 
 
 def setup_multi_items(app: FastAPI, app_input: NormalizedInput) -> None:
@@ -53,28 +143,88 @@ def setup_multi_items(app: FastAPI, app_input: NormalizedInput) -> None:
     @app.get("/", response_class=HTMLResponse)
     async def index():
         if len(visible) == 1:
-            from fastapi.responses import RedirectResponse
             return RedirectResponse(url=visible[0]["url"])
         return render_index(app_input)
 
-    register_navigation_routes(app, app_input.navigation_data, app_input)
+    entries: dict[str, _FunctionEntry] = {}
+    _collect_functions(app_input.items, app_input.navigation_data, entries)
+    app.router.routes.append(FunctionDispatchRoute(entries, app_input))
 
 
 def setup_single_function(app: FastAPI, app_input: NormalizedInput) -> None:
     """Set up routes for single-function mode."""
     meta = app_input.single_function
 
-    page_handler, submit_handler = create_handlers(meta, app_input, base_url="")
+    page_handler, submit_handler, result_handler = create_handlers(meta, app_input, base_url="")
 
     app.get("/", response_class=HTMLResponse)(page_handler)
     app.post("/submit")(submit_handler)
+    if meta.cache_max_age is not None:
+        app.get("/result")(result_handler)
+
+
+def _accepts_gzip(accept_encoding: str) -> bool:
+    """Check for a gzip coding with non-zero quality in Accept-Encoding."""
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        if coding.strip() not in ("gzip", "*"):
+            continue
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                return float(q[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
 
 
 def setup_download_route(app: FastAPI) -> None:
-    """Register the file download route."""
+    """Register the file download route.
+
+    Returned files never change once stored, so the ETag is derived from the
+    file_id. Range requests (resumable downloads) are handled by Starlette's
+    FileResponse; text-like files are served from a gzip variant when the
+    client accepts it.
+    """
+
+    # Registered before /download/{file_id} so "bundle" is not taken as an ID.
+    @app.get("/download/bundle")
+    async def download_bundle(ids: str = "", filename: str = "files.zip"):
+        """Stream a ZIP of several returned files, built on the fly."""
+        file_ids = [i for i in ids.split(",") if i]
+        if not file_ids or len(file_ids) > MAX_BUNDLE_FILES:
+            return JSONResponse(
+                {"error": f"Provide between 1 and {MAX_BUNDLE_FILES} file IDs"},
+                status_code=400,
+            )
+        if not all(UUID_PATTERN.match(i) for i in file_ids):
+            return JSONResponse({"error": "Invalid file ID"}, status_code=400)
+
+        entries = []
+        for file_id in dict.fromkeys(file_ids):
+            file_info = get_returned_file(file_id)
+            if not file_info:
+                return JSONResponse(
+                    {"error": f"File not found or expired: {file_id}"}, status_code=404
+                )
+            entries.append(file_info)
+
+        if not filename.endswith(".zip"):
+            filename = f"{filename}.zip"
+
+        # Sync generator: Starlette iterates it in a worker thread.
+        return StreamingResponse(
+            iter_zip_bundle(entries),
+            media_type="application/zip",
+            headers={
+                "Content-Disposition": f"attachment; filename*=utf-8''{quote(filename)}",
+                "Cache-Control": "no-store",
+            },
+        )
 
     @app.get("/download/{file_id}")
-    async def download_file(file_id: str):
+    async def download_file(file_id: str, request: Request):
         # Reject invalid IDs before touching the file store.
         if not UUID_PATTERN.match(file_id):
             return JSONResponse({"error": "Invalid file ID"}, status_code=400)
@@ -83,11 +233,82 @@ def setup_download_route(app: FastAPI) -> None:
         if not file_info:
             return JSONResponse({"error": "File not found or expired"}, status_code=404)
 
+        path = file_info["path"]
+        media_type = return_file_handler.guess_media_type(file_info["filename"])
+        expires_at = file_info["timestamp"] + get_settings().returns_lifetime
+
+        headers = {
+            "Cache-Control": f"private, max-age={max(0, expires_at - int(time.time()))}",
+            "ETag": f'"{file_id}"',
+        }
+
+        if path is None:
+            # Remote storage: let the client fetch it directly when possible.
+            url = return_file_handler.get_storage().url(file_info["key"], file_info["filename"])
+            if url is not None:
+                return RedirectResponse(url, status_code=307)
+
+            if_none_match = request.headers.get("if-none-match")
+            if if_none_match and etag_matches(if_none_match, headers["ETag"]):
+                return Response(status_code=304, headers=headers)
+
+            headers["Content-Disposition"] = (
+                f"attachment; filename*=utf-8''{quote(file_info['filename'])}"
+            )
+            headers["Content-Length"] = str(file_info["size"])
+            return StreamingResponse(
+                iter_returned_file(file_info), media_type=media_type, headers=headers
+            )
+
+        if return_file_handler.is_compressible(media_type, file_info["size"]):
+            headers["Vary"] = "Accept-Encoding"
+            if _accepts_gzip(request.headers.get("accept-encoding", "")):
+                gz_path = get_gzip_variant(path)
+                if gz_path is not None:
+                    path = gz_path
+                    headers["ETag"] = f'"{file_id}-gzip"'
+                    headers["Content-Encoding"] = "gzip"
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and etag_matches(if_none_match, headers["ETag"]):
+            headers.pop("Content-Encoding", None)
+            return Response(status_code=304, headers=headers)
+
         return FastAPIFileResponse(
-            path=file_info["path"],
+            path=path,
             filename=file_info["filename"],
-            media_type="application/octet-stream",
+            media_type=media_type,
+            headers=headers,
+        )
+
+def setup_results_route(app: FastAPI) -> None:
+    """Register the paged rows route for large table results."""
+
+    @app.get("/results/{result_id}/rows")
+    async def result_rows(result_id: str, offset: int = 0, limit: int = 100, sort: str = ""):
+        """Return rows [offset, offset+limit) of a large table.
+
+        sort is a column index, prefixed with "-" for descending order.
+        """
+        if not UUID_PATTERN.match(result_id):
+            return JSONResponse({"error": "Invalid result ID"}, status_code=400)
+
+        column = None
+        descending = sort.startswith("-")
+        if sort:
+            try:
+                column = int(sort.lstrip("-"))
+            except ValueError:
+                return JSONResponse({"error": "Invalid sort column"}, status_code=400)
+
+        page = await asyncio.to_thread(
+            get_rows, result_id, offset, min(limit, MAX_PAGE_ROWS), column, descending
         )
+        if page is None:
+            return JSONResponse({"error": "Result not found or expired"}, status_code=404)
+
+        return page
+
 
 def setup_doc_route(app: FastAPI, app_input: NormalizedInput) -> None:
     @app.get("/doc", response_class=PlainTextResponse)
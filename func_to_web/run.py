@@ -1,101 +1,284 @@
 from pathlib import Path
 from typing import Any, Callable
 
-from .core import save_file_handler, return_file_handler
-from .core.server import create_fastapi_app, start_server
+from fastapi import FastAPI
+
+from .core import save_file_handler, return_file_handler, image
+from .core.settings import Settings, SettingsMiddleware, use_settings
+from .core.storage import Storage
+from .core.server import create_fastapi_app, start_server, start_workers
 from .core.normalization import normalize_input
+from .core.lazy_import import FunctionManifest
+from .core.resources import Resource, ResourceRegistry
 from .core.auth import setup_auth
 from .core.utils import print_beta_warning, create_pytypeinput_assets
 
 from .models import FunctionMetadata
-from .routes import setup_multi_items, setup_single_function, setup_download_route, setup_doc_route
-from . import call_function
+from .materialize import Materializer
+from .routes import (
+    setup_multi_items, setup_single_function, setup_download_route,
+    setup_results_route, setup_doc_route
+)
+
+
+def create_app(
+    func: Callable[..., Any] | str | FunctionMetadata | list,
+    auth: dict[str, str] | None = None,
+    secret_key: str | None = None,
+    api_tokens: dict[str, str] | None = None,
+    app_title: str | None = None,
+    css_vars: dict[str, str] | None = None,
+    favicon: str | Path | None = None,
+    function_manifest: str | Path | None = None,
+    resources: dict[Any, Resource | Callable[[], Any]] | None = None,
+    uploads_dir: str | Path = "./uploads",
+    max_file_size: int | None = None,
+    keep_uploads: bool = False,
+    returns_dir: str | Path | Storage = "./returned_files",
+    returns_lifetime: int = 3600,
+    returns_max_bytes: int | None = None,
+    stream_prints: bool = True,
+    max_inline_size: int | None = 5 * 1024 * 1024,
+    image_format: str = "png",
+    image_quality: int = 85,
+    figure_format: str | None = None,
+    image_preview_size: int | None = 1280,
+    root_path: str = "",
+    fastapi_config: dict[str, Any] | None = None,
+    front_dir: str | Path | None = None,
+    assets_dir: str | Path | None = None,
+) -> FastAPI:
+    """Build the web application without starting a server.
+
+    The returned app is a regular ASGI app: serve it with any ASGI server
+    (uvicorn, gunicorn with uvicorn workers, hypercorn) or mount it into an
+    existing FastAPI/Starlette app. Its settings belong to the app, so several
+    apps with different directories and limits can share one process.
+
+    Arguments are the same as run() minus the server options.
+
+    Example:
+        app = create_app([add, multiply], returns_dir="/srv/ftw/returns")
+        # uvicorn mymodule:app --workers 4
+    """
+    create_pytypeinput_assets()
+
+    if image_format not in image.IMAGE_FORMATS:
+        raise ValueError(f"image_format must be one of {sorted(image.IMAGE_FORMATS)}")
+    if figure_format is not None and figure_format not in image.FIGURE_FORMATS:
+        raise ValueError(f"figure_format must be one of {sorted(image.FIGURE_FORMATS)}")
+
+    # With a Storage backend, the default returns_dir only spools streamed results.
+    if isinstance(returns_dir, Storage):
+        storage, returns_dir = returns_dir, "./returned_files"
+    else:
+        storage = None
+
+    settings = Settings(
+        uploads_dir=Path(uploads_dir),
+        max_file_size=max_file_size,
+        keep_uploads=keep_uploads,
+        returns_dir=Path(returns_dir),
+        storage=storage,
+        returns_lifetime=returns_lifetime,
+        returns_max_bytes=returns_max_bytes,
+        stream_prints=stream_prints,
+        max_inline_size=max_inline_size,
+        image_format=image_format,
+        image_quality=image_quality,
+        figure_format=figure_format,
+        image_preview_size=image_preview_size,
+    )
+    settings.uploads_dir.mkdir(parents=True, exist_ok=True)
+    settings.returns_dir.mkdir(parents=True, exist_ok=True)
+
+    with use_settings(settings):
+        count = save_file_handler.cleanup_uploads_dir()
+        if count > 0:
+            print(f"Cleaned up {count} leftover upload folders from previous run")
+
+        count = return_file_handler.cleanup_returned_files()
+        if count > 0:
+            print(f"Cleaned up {count} expired returned files from previous run")
+
+    registry = ResourceRegistry(resources)
+    app_input = normalize_input(
+        func, app_title, css_vars, favicon,
+        manifest=FunctionManifest(function_manifest),
+        resources=registry,
+    )
+    app_input.materializer = Materializer(app_input)
+
+    if fastapi_config is None:
+        fastapi_config = {}
+
+    app = create_fastapi_app(root_path, fastapi_config, front_dir, assets_dir)
+    app.state.func_to_web_settings = settings
+
+    setup_download_route(app)
+    setup_results_route(app)
+    setup_doc_route(app, app_input)
+
+    if app_input.single_function:
+        setup_single_function(app, app_input)
+    else:
+        setup_multi_items(app, app_input)
+
+    if auth or api_tokens:
+        setup_auth(app, auth or {}, secret_key, api_tokens)
+
+    # Outermost, so every request (and the lifespan) runs with this app's settings.
+    app.add_middleware(SettingsMiddleware, settings=settings)
+
+    # Load the returned-file index at startup rather than on the first request.
+    # Runs in every worker of an external process manager; mounted sub-apps
+    # get no lifespan and load it lazily instead.
+    app.add_event_handler("startup", return_file_handler.rebuild_index)
+
+    # Resources and snapshots of materialized functions belong to each worker.
+    # Eager resources are created before the first refresh, and the scheduler
+    # stops before resources are disposed (handlers run in registration order).
+    app.add_event_handler("startup", registry.start)
+    app.add_event_handler("startup", app_input.materializer.start)
+    app.add_event_handler("shutdown", app_input.materializer.stop)
+    app.add_event_handler("shutdown", registry.close)
+
+    return app
 
 
 def run(
-    func: Callable[..., Any] | FunctionMetadata | list,
+    func: Callable[..., Any] | str | FunctionMetadata | list,
     host: str = "0.0.0.0",
     port: int = 8000,
     auth: dict[str, str] | None = None,
     secret_key: str | None = None,
+    api_tokens: dict[str, str] | None = None,
     app_title: str | None = None,
     css_vars: dict[str, str] | None = None,
     favicon: str | Path | None = None,
+    function_manifest: str | Path | None = None,
+    resources: dict[Any, Resource | Callable[[], Any]] | None = None,
     uploads_dir: str | Path = "./uploads",
     max_file_size: int | None = None,
     keep_uploads: bool = False,
-    returns_dir: str | Path = "./returned_files",
+    returns_dir: str | Path | Storage = "./returned_files",
     returns_lifetime: int = 3600,
+    returns_max_bytes: int | None = None,
     stream_prints: bool = True,
+    max_inline_size: int | None = 5 * 1024 * 1024,
+    image_format: str = "png",
+    image_quality: int = 85,
+    figure_format: str | None = None,
+    image_preview_size: int | None = 1280,
     root_path: str = "",
     fastapi_config: dict[str, Any] | None = None,
     front_dir: str | Path | None = None,
     assets_dir: str | Path | None = None,
+    workers: int = 1,
+    max_requests: int | None = None,
+    max_worker_memory: int | None = None,
     **uvicorn_kwargs
 ):
     """Run the web application server.
 
+    Builds the app with create_app() and serves it with Uvicorn, optionally
+    under a supervisor with several workers.
+
     Args:
-        func: Single function, FunctionMetadata, or list of functions/groups.
+        func: Single function, FunctionMetadata, or list of functions/groups. Functions
+            may be given as "package.module:function" strings to import them lazily.
         host: Server host address.
         port: Server port.
         auth: Optional dictionary of {username: password} for authentication.
         secret_key: Secret key for session signing. Auto-generated if None.
+        api_tokens: Optional dictionary of {client_name: token} accepted as
+            "Authorization: Bearer <token>", so scripts can call the API without a
+            session. Tokens may be given hashed (hash_api_token()) and are only
+            kept hashed in memory. Enables authentication even without auth.
         app_title: Custom application title.
         css_vars: CSS variable overrides.
         favicon: Path to favicon file.
+        function_manifest: Optional JSON file caching the description and parameters
+            of functions given as "package.module:function" strings, so they can be
+            listed (and documented in /doc) without importing their modules.
+            Refreshed automatically when a module's source changes.
+        resources: Optional dictionary of {type: factory or Resource} of objects shared
+            by the functions of a worker (database connections, ML models). A parameter
+            annotated with one of these types is filled with the worker's instance and
+            left out of the form. Factories may be sync or async; (async) generator
+            factories are resumed on shutdown to dispose of the instance.
         uploads_dir: Directory for uploaded files.
         max_file_size: Maximum size in bytes for uploaded files, None for unlimited.
         keep_uploads: If True, uploaded files are not deleted after function execution.
-        returns_dir: Directory for files returned by functions.
+        returns_dir: Directory for files returned by functions, or a Storage backend
+            (LocalStorage, MemoryStorage, S3Storage). MemoryStorage requires workers=1.
         returns_lifetime: Seconds before returned files are deleted (default: 3600).
+        returns_max_bytes: Maximum total size of returns_dir in bytes, None for unlimited.
+            Least recently downloaded files are evicted first. The limit is shared by
+            all workers using the same storage.
         stream_prints: If True, print() output is streamed to the client in real time.
+        max_inline_size: Text and table results larger than this many characters are
+            saved as a download (.txt / .csv) with only a preview shown inline.
+            None to always send results inline.
+        image_format: Encoding of returned PIL images and figures: "png", "webp" or "jpeg".
+        image_quality: Quality (1-100) for webp and jpeg images.
+        figure_format: Encoding of matplotlib figures; None uses image_format, "svg" for vectors.
+        image_preview_size: Images whose longest side exceeds this many pixels are shown
+            as a downscaled preview linking to the full resolution. None to disable.
         root_path: FastAPI root path for reverse proxy.
         fastapi_config: Additional FastAPI configuration.
         front_dir: Optional directory served at /front (with html=True for SPA-style routing).
         assets_dir: Optional directory served at /assets.
+        workers: Number of worker processes sharing the port (Linux/macOS). The app is
+            built once and forked, so every worker uses the same secret_key.
+        max_requests: Recycle a worker after about this many requests (with jitter),
+            once its in-flight requests finish. None to never recycle.
+        max_worker_memory: Replace a worker whose resident memory exceeds this many
+            bytes (Linux only). None for no limit.
         **uvicorn_kwargs: Additional Uvicorn configuration.
     """
-    print_beta_warning()
-    create_pytypeinput_assets()
-
-    save_file_handler.UPLOADS_DIR = Path(uploads_dir)
-    save_file_handler.UPLOADS_DIR.mkdir(parents=True, exist_ok=True)
-    save_file_handler.MAX_FILE_SIZE = max_file_size
-    save_file_handler.KEEP_UPLOADS = keep_uploads
-
-    return_file_handler.RETURNS_DIR = Path(returns_dir)
-    return_file_handler.RETURNS_DIR.mkdir(parents=True, exist_ok=True)
-    return_file_handler.RETURNS_LIFETIME_SECONDS = returns_lifetime
+    if workers > 1 and isinstance(returns_dir, Storage) and returns_dir.per_process:
+        raise ValueError(
+            f"{type(returns_dir).__name__} keeps files inside one process; with workers > 1 "
+            f"downloads would fail on every other worker. Use LocalStorage or S3Storage."
+        )
 
-    call_function.STREAM_PRINTS = stream_prints
-
-    count = save_file_handler.cleanup_uploads_dir()
-    if count > 0:
-        print(f"Cleaned up {count} leftover upload folders from previous run")
-
-    count = return_file_handler.cleanup_returned_files()
-    if count > 0:
-        print(f"Cleaned up {count} expired returned files from previous run")
-
-    return_file_handler.start_cleanup_timer()
-
-    app_input = normalize_input(func, app_title, css_vars, favicon)
-
-    if fastapi_config is None:
-        fastapi_config = {}
-
-    app = create_fastapi_app(root_path, fastapi_config, front_dir, assets_dir)
+    print_beta_warning()
 
-    setup_download_route(app)
-    setup_doc_route(app, app_input)
+    app = create_app(
+        func,
+        auth=auth,
+        secret_key=secret_key,
+        api_tokens=api_tokens,
+        app_title=app_title,
+        css_vars=css_vars,
+        favicon=favicon,
+        function_manifest=function_manifest,
+        resources=resources,
+        uploads_dir=uploads_dir,
+        max_file_size=max_file_size,
+        keep_uploads=keep_uploads,
+        returns_dir=returns_dir,
+        returns_lifetime=returns_lifetime,
+        returns_max_bytes=returns_max_bytes,
+        stream_prints=stream_prints,
+        max_inline_size=max_inline_size,
+        image_format=image_format,
+        image_quality=image_quality,
+        figure_format=figure_format,
+        image_preview_size=image_preview_size,
+        root_path=root_path,
+        fastapi_config=fastapi_config,
+        front_dir=front_dir,
+        assets_dir=assets_dir,
+    )
 
-    if app_input.single_function:
-        setup_single_function(app, app_input)
+    if workers > 1 or max_requests is not None or max_worker_memory is not None:
+        start_workers(
+            app, host, port, uvicorn_kwargs,
+            workers=workers,
+            max_requests=max_requests,
+            max_memory=max_worker_memory,
+        )
     else:
-        setup_multi_items(app, app_input)
-
-    if auth:
-        setup_auth(app, auth, secret_key)
-
-    start_server(app, host, port, uvicorn_kwargs)
\ No newline at end of file
+        start_server(app, host, port, uvicorn_kwargs)
@@ -15,25 +15,50 @@ from pytypeinput.types import (Color, Email, ImageFile, VideoFile,
 class FileResponse(BaseModel):
     """Return a file from a function as a downloadable result.
 
-    Provide either `data` or `path`, not both.
+    Provide exactly one of `data`, `path` or `stream`.
+
+    Files given by `path` are copied into the returns directory without being
+    read into memory. Set `move=True` to move them instead (the original path
+    no longer exists afterwards) — ideal for temporary files.
+
+    `stream` accepts an iterator or async iterator of bytes chunks, or a binary
+    file-like object. It is written to the returns directory chunk by chunk,
+    so memory stays flat regardless of the file size.
 
     Examples:
         return FileResponse(data=b"hello", filename="result.txt")
         return FileResponse(path="/tmp/report.pdf")
+        return FileResponse(path="/tmp/export.zip", move=True)
+        return FileResponse(stream=generate_csv_rows(), filename="dump.csv")
         return [FileResponse(...), FileResponse(...)]
     """
     data: bytes | None = None
     path: str | None = None
+    stream: Any = None
     filename: Annotated[str, Field(max_length=150)] | None= None
+    move: bool = False
 
     @model_validator(mode="after")
     def _validate_data_or_path(self):
-        if self.data is None and self.path is None:
-            raise ValueError("Either 'data' or 'path' must be provided")
-        if self.data is not None and self.path is not None:
-            raise ValueError("Cannot provide both 'data' and 'path'")
+        sources = [x for x in (self.data, self.path, self.stream) if x is not None]
+        if not sources:
+            raise ValueError("Either 'data', 'path' or 'stream' must be provided")
+        if len(sources) > 1:
+            raise ValueError("Provide only one of 'data', 'path' or 'stream'")
+        if self.stream is not None and not (
+            hasattr(self.stream, "read")
+            or hasattr(self.stream, "__aiter__")
+            or hasattr(self.stream, "__iter__")
+        ):
+            raise ValueError("'stream' must be an iterator, async iterator or file-like object")
+        if isinstance(self.stream, (bytes, str)):
+            raise ValueError("Use 'data' for in-memory bytes, 'stream' expects chunks")
+        if self.move and self.path is None:
+            raise ValueError("'move' requires 'path'")
         if self.data is not None and self.filename is None:
             raise ValueError("'filename' is required when providing 'data'")
+        if self.stream is not None and self.filename is None:
+            raise ValueError("'filename' is required when providing 'stream'")
         if self.path is not None and self.filename is None:
             self.filename = Path(self.path).name
         return self
@@ -0,0 +1,21 @@
+"""Server entry points are imported lazily but behave like plain imports."""
+import subprocess
+import sys
+
+
+def _run(code: str) -> str:
+    return subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout.strip()
+
+
+def test_types_import_does_not_load_the_server():
+    assert _run("import sys, func_to_web; print('fastapi' in sys.modules)") == "False"
+
+
+def test_entry_points_from_one_module_are_functions():
+    out = _run(
+        "from func_to_web import create_app, run; import func_to_web; "
+        "print(callable(run), type(run).__name__, func_to_web.run is run)"
+    )
+    assert out == "True function True"
@@ -0,0 +1,49 @@
+"""URL reversal for the dispatched function routes."""
+import pytest
+from starlette.routing import Mount, NoMatchFound, Router
+
+from func_to_web import FunctionMetadata, create_app
+
+
+def add(a: int, b: int) -> int:
+    return a + b
+
+
+def square(x: int) -> int:
+    return x * x
+
+
+def echo(text: str) -> str:
+    return text
+
+
+@pytest.fixture
+def app(tmp_path):
+    return create_app(
+        [{"Math": [add, FunctionMetadata(square, cache_max_age=60)]}, {"Text": [echo]}],
+        uploads_dir=tmp_path / "u",
+        returns_dir=tmp_path / "r",
+        auth={"admin": "secret"},
+        secret_key="x" * 32,
+    )
+
+
+def test_function_routes_are_reversible(app):
+    assert app.url_path_for("math/add") == "/math/add"
+    assert app.url_path_for("math/add:submit") == "/math/add/submit"
+    assert app.url_path_for("math/square:result") == "/math/square/result"
+    assert app.url_path_for("text/echo") == "/text/echo"
+
+
+def test_other_names_fall_through_to_later_routes(app):
+    assert app.url_path_for("logout") == "/logout"
+    for name in ("unknown", "math/add:result", "math/add:other", "math"):
+        with pytest.raises(NoMatchFound):
+            app.url_path_for(name)
+    with pytest.raises(NoMatchFound):
+        app.url_path_for("math/add", file_id="x")
+
+
+def test_reversal_through_a_mount(app):
+    outer = Router(routes=[Mount("/tools", app=app)])
+    assert outer.url_path_for("math/add:submit") == "/tools/math/add/submit"
@@ -0,0 +1,73 @@
+"""S3Storage against moto's in-process S3 stand-in (no network, no credentials)."""
+import time
+import uuid
+
+import pytest
+
+pytest.importorskip("boto3")
+moto = pytest.importorskip("moto")
+
+import boto3
+
+from func_to_web.core import return_file_handler
+from func_to_web.core.settings import Settings, use_settings
+from func_to_web.core.storage import S3Storage, Storage
+
+
+@pytest.fixture
+def s3_settings(tmp_path, monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+
+    with moto.mock_aws():
+        boto3.client("s3").create_bucket(Bucket="returns")
+        storage = S3Storage("returns", prefix="ftw/")
+        settings = Settings(returns_dir=tmp_path / "spool", storage=storage)
+        with use_settings(settings):
+            yield settings
+
+
+def test_storage_is_abstract():
+    with pytest.raises(TypeError):
+        Storage()
+
+
+def test_save_and_download_roundtrip(s3_settings):
+    file_id = return_file_handler.save_returned_stream([b"hello ", b"world"], "greeting.txt")
+
+    entry = return_file_handler.get_returned_file(file_id)
+    assert entry["filename"] == "greeting.txt"
+    assert entry["size"] == 11
+    assert entry["path"] is None
+
+    storage = s3_settings.storage
+    assert b"".join(return_file_handler.iter_returned_file(entry)) == b"hello world"
+    assert storage.read_range(entry["key"], 6, 11) == b"world"
+    assert "greeting.txt" in storage.url(entry["key"], entry["filename"])
+
+    keys = boto3.client("s3").list_objects_v2(Bucket="returns")["Contents"]
+    assert [k["Key"] for k in keys] == ["ftw/" + entry["key"]]
+
+
+def test_index_finds_files_written_by_another_process(s3_settings):
+    return_file_handler.rebuild_index()
+
+    # Written straight to the bucket, as another worker or node would.
+    file_id = uuid.uuid4().hex
+    key = f"{file_id}___{int(time.time())}___report.csv"
+    s3_settings.storage.client.put_object(Bucket="returns", Key="ftw/" + key, Body=b"a,b\n")
+
+    assert return_file_handler.get_returned_file(file_id)["key"] == key
+    assert return_file_handler.get_returned_file(uuid.uuid4().hex) is None
+
+
+def test_startup_cleanup_deletes_expired_objects(s3_settings):
+    expired = f"{uuid.uuid4().hex}___{int(time.time()) - 10_000}___old.txt"
+    fresh = f"{uuid.uuid4().hex}___{int(time.time())}___new.txt"
+    for key in (expired, fresh):
+        s3_settings.storage.client.put_object(Bucket="returns", Key="ftw/" + key, Body=b"x")
+
+    assert return_file_handler.cleanup_returned_files() == 1
+    remaining = [key for key, _ in s3_settings.storage.list()]
+    assert remaining == [fresh]
@@ -0,0 +1,25 @@
+"""Multi-worker validation and supervisor behaviour (no extra dependencies)."""
+import os
+
+import pytest
+
+from func_to_web import create_app, run
+from func_to_web.core import server
+from func_to_web.core.storage import MemoryStorage
+
+
+def test_memory_storage_is_refused_with_workers():
+    with pytest.raises(ValueError, match="MemoryStorage"):
+        run(lambda x: x, returns_dir=MemoryStorage(), workers=2)
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="workers require os.fork")
+def test_supervisor_gives_up_on_workers_crashing_at_startup(tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "STARTUP_BACKOFF", 0.01)
+    app = create_app(lambda x: x, uploads_dir=tmp_path / "u", returns_dir=tmp_path / "r")
+
+    def crash():
+        raise RuntimeError("broken worker")
+
+    with pytest.raises(RuntimeError, match="exited before serving"):
+        server.start_workers(app, "127.0.0.1", 0, {}, workers=2, on_worker_start=crash)